@@ -0,0 +1,152 @@
+"""
+Automation mode: for n = 2, 3, ..., find the 2-special partitions of n whose
+solutions are not yet in the database, solve them (on a pool of worker
+processes, one at a time with a concurrent backend, or several at once on
+the celery workers through a pipeline) and write the results
+back in batched transactions, along with the metrics of each solve.
+
+Interrupting is safe: finished results are committed before exiting, and a
+restart skips every partition already stored, so no work is repeated.
+"""
+from polytabloid import find_solutions
+from pool import imap_unordered, worker_pool
+from partition import Partition, two_special_pairs
+from db import insert_metrics, insert_solutions, partition_str
+from schedule import CostModel, schedule
+from solutions import solution_cache
+import instrument
+
+def pending_pairs(cur, n, regen=False):
+    """
+    Yields (p, conjugate) for each 2-special pair of partitions of n not
+    yet fully stored, as two_special_pairs orders them. Which side gets
+    solved is up to the cost model (see schedule.py).
+    """
+    if regen:
+        known = set()
+    else:
+        known = set(row[0] for row in cur.execute("SELECT partition FROM specht WHERE n=?", (n,)))
+    for p, p2 in two_special_pairs(n):
+        if partition_str(p) in known and partition_str(p2) in known:
+            continue
+        yield p, p2
+
+def resume_from(cur):
+    """
+    Lowest n with a pair not yet fully stored, up to the largest n in the
+    database. With a pipeline, results for n + 1 can be stored while the
+    partitions of n are still in flight, so an interrupted run may leave
+    gaps below the largest n.
+    """
+    top = cur.execute("SELECT max(n) FROM specht").fetchone()[0]
+    if not top:
+        return 2
+    for n in range(2, top):
+        if any(True for pair in pending_pairs(cur, n)):
+            return n
+    return top
+
+def profiled(solver, shape):
+    instrument.profile.reset()
+    solution = solver(shape)
+    return solution, instrument.profile.metrics()
+
+# The partitions of n share most of their sub-shapes, so each process
+# builds their standard tableaux through one find_solutions memo, which is
+# dropped when the process moves on to the next n.
+_memo = {"n": None, "shapes": {}}
+
+def _solve(job):
+    n, shape, p_str, p2_str = job
+    if _memo["n"] != n:
+        _memo["n"], _memo["shapes"] = n, {}
+    solve = lambda shape: find_solutions([shape], memo=_memo["shapes"])[0]
+    return (n, p_str, p2_str) + profiled(solve, shape)
+
+def write_results(cur, results):
+    # conjugate has same solution, so insert both
+    rows, metrics = [], []
+    for n, p_str, p2_str, solution, m in results:
+        rows += [(n, Partition(p_str), solution % 2), (n, Partition(p2_str), solution % 2)]
+        if m is not None: # not solved, but known (see solutions.py)
+            metrics.append((n, Partition(p_str), m))
+    insert_solutions(cur, rows)
+    insert_metrics(cur, metrics)
+
+def automation_backend(jobs=None, **options):
+    """
+    Backend "local": each partition is solved by find_solutions in a
+    single process, on a pool of jobs of them (see backends.py).
+    """
+    return {"jobs": jobs}
+
+def automate(conn, n=2, stop=None, regen=False, solver=None, jobs=None, batch_size=64, verbosity=0, profile=False, pipeline=None):
+    """
+    Run automation from n upwards, up to stop (or forever). Partitions whose
+    solution is already known (see solutions.py) are stored without solving;
+    the others are solved on the side and in the order chosen by the cost
+    model (see schedule.py), most expensive first. With a solver
+    (such as a concurrent backend) partitions are solved one at a time with
+    it; with a pipeline (see tasks.Pipeline) the partitions of n are queued
+    on it and collected as they finish, overlapping with those of n + 1;
+    otherwise find_solutions runs on a pool of jobs processes. With
+    profile, the per-phase breakdown of each solve is printed.
+    """
+    cur = conn.cursor()
+    known = solution_cache(conn)
+    pool = None
+    if solver is None and pipeline is None and jobs != 1:
+        pool = worker_pool(jobs)
+    batch = []
+
+    def record(results):
+        for result in results:
+            if verbosity > 0:
+                print "Solved ({}): {}".format(result[1], result[3] % 2)
+            if profile:
+                print "Profile of ({}):".format(result[1])
+                print instrument.report(result[4])
+            batch.append(result)
+            if len(batch) >= batch_size:
+                flush()
+
+    def flush():
+        write_results(cur, batch)
+        conn.commit()
+        del batch[:]
+
+    try:
+        while stop is None or n <= stop:
+            # pairs in a known family, or with one side already stored, need no solve
+            unknown = []
+            for p, p2 in pending_pairs(cur, n, regen):
+                solution = None if regen else known.lookup(p)
+                if solution is None:
+                    unknown.append((p, p2))
+                else:
+                    batch.append((n, partition_str(p), partition_str(p2), solution, None))
+            # refitted for every n, from the metrics of everything solved so far
+            scheduled = schedule(unknown, CostModel.from_metrics(cur))
+            pending = [(n, p.vals, partition_str(p), partition_str(p2)) for p, p2, cost in scheduled]
+            if verbosity > 0:
+                print "n = {}: {} partitions to solve, predicted {:.1f}s of work".format(n, len(pending), sum(cost for p, p2, cost in scheduled))
+            if pool is not None:
+                results = imap_unordered(pool, _solve, pending)
+            elif pipeline is not None:
+                for m, shape, p_str, p2_str in pending:
+                    pipeline.submit(shape, tag=(m, p_str, p2_str))
+                results = (tag + (solution, metrics) for tag, solution, metrics in pipeline.as_completed(drain=False))
+            elif solver is not None:
+                results = ((m, p_str, p2_str) + profiled(solver, shape) for m, shape, p_str, p2_str in pending)
+            else:
+                results = (_solve(job) for job in pending)
+            record(results)
+            flush()
+            n += 1
+        if pipeline is not None:
+            record(tag + (solution, metrics) for tag, solution, metrics in pipeline.as_completed())
+    finally:
+        if batch:
+            flush()
+        if pool is not None:
+            pool.terminate()
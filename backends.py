@@ -0,0 +1,31 @@
+"""
+Registry of solver backends for automation. A backend is named by the
+module that implements it and a factory in that module, which takes the
+command line options and returns the keyword arguments to pass to
+automation.automate. The module is only imported when its backend is
+selected, so that query-only runs never load numpy, multiprocessing or
+Celery.
+"""
+from importlib import import_module
+
+_registry = {}
+
+def register(name, module, factory):
+    _registry[name] = (module, factory)
+
+def names():
+    return sorted(_registry)
+
+def load(name, **options):
+    """
+    automate() keyword arguments for the named backend, importing it now.
+    """
+    if name not in _registry:
+        raise ValueError("Unknown backend '{}'; choose from {}.".format(name, ", ".join(names())))
+    module, factory = _registry[name]
+    return getattr(import_module(module), factory)(**options)
+
+register("local", "automation", "automation_backend")
+register("pool", "pool", "automation_backend")
+register("celery", "tasks", "automation_backend")
+register("tiled", "polytabloid", "automation_backend")
@@ -0,0 +1,135 @@
+#!/usr/bin/env/python
+"""
+Benchmarks for the solver hot paths over a fixed ladder of shapes.
+
+Each case runs in a freshly forked process, so per-process caches (shape
+tables, interned partitions, ...) start cold and the peak memory reported
+is that of the case alone. Results are written as JSON and can be compared
+against a saved baseline; any case that got slower (or bigger) than the
+baseline by more than the tolerance makes the script exit with status 1.
+
+    python bench.py --save-baseline         # record bench_baseline.json
+    python bench.py                         # compare against it
+"""
+from argparse import ArgumentParser
+from multiprocessing import Pipe, Process
+import json
+import os
+import resource
+import sys
+import time
+
+# The memory-mapped tableaux cache would hide enumeration costs.
+os.environ["POLYTABLOID_CACHE"] = ""
+
+from polytabloid import find_solution, find_solution_new, total_order
+from partition import Partition, partition_gen, two_special_pairs
+
+HOOKS = [(5,1,1,1,1), (9,1,1,1,1,1,1)]
+TWO_ROWS = [(5,3), (7,5)]
+TWO_SPECIAL = [p.vals for n in range(2, 17) for p, p2 in two_special_pairs(n)
+               if not p.is_one_dimensional() and not p.is_hook()]
+LADDER = sorted(set(HOOKS + TWO_ROWS + [(3,3,3)] + TWO_SPECIAL), key=lambda s: (sum(s), s))
+
+def polytabloid_work(shape):
+    # pair tests for find_solution's approach: f * (column permutations)
+    return Partition(*shape).dimension() * Partition(*shape).conjugate().num_row_perms()
+
+def _all_pairs(shape):
+    standards = list(total_order(shape))
+    for t in standards:
+        for s in standards:
+            t.generates(s)
+
+def _all_polytabloids(shape):
+    for t in total_order(shape):
+        for s in t.polytabloid():
+            pass
+
+def cases():
+    """
+    (name, function, args) for every benchmark, in a fixed order.
+    """
+    for shape in LADDER:
+        f = Partition(*shape).dimension()
+        yield "total_order {}".format(shape), lambda s: sum(1 for t in total_order(s)), (shape,)
+        if f <= 300:
+            yield "Tableaux.generates {}".format(shape), _all_pairs, (shape,)
+        if polytabloid_work(shape) <= 50000:
+            yield "Tableaux.polytabloid {}".format(shape), _all_polytabloids, (shape,)
+            yield "find_solution {}".format(shape), lambda s: find_solution(s, skip_known_families=False), (shape,)
+        if f <= 5000:
+            yield "find_solution_new {}".format(shape), find_solution_new, (shape,)
+    yield "partition_gen 40", lambda n: sum(1 for p in partition_gen(n)), (40,)
+    yield "two_special_pairs 60", lambda n: sum(1 for p in two_special_pairs(n)), (60,)
+
+def _run_case(conn, func, args):
+    sys.stdout = open(os.devnull, "w") # find_solution prints every pair it finds
+    start_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.time()
+    func(*args)
+    seconds = time.time() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - start_kb
+    conn.send((seconds, peak_kb))
+    conn.close()
+
+def measure(func, args, repeat=3):
+    """
+    Best wall time and peak memory growth (KiB) over repeat fresh processes.
+    """
+    runs = []
+    for _ in range(repeat):
+        parent, child = Pipe()
+        proc = Process(target=_run_case, args=(child, func, args))
+        proc.start()
+        runs.append(parent.recv())
+        proc.join()
+    return {"seconds": min(r[0] for r in runs), "peak_kb": min(r[1] for r in runs)}
+
+def compare(results, baseline, tolerance=0.25, min_seconds=0.05, min_kb=1024):
+    """
+    Names of cases that regressed against the baseline, with a description.
+    Small absolute differences are ignored as noise.
+    """
+    regressions = []
+    for name, r in sorted(results.items()):
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if r["seconds"] > base["seconds"] * (1 + tolerance) and r["seconds"] - base["seconds"] > min_seconds:
+            regressions.append((name, "time {:.3f}s -> {:.3f}s".format(base["seconds"], r["seconds"])))
+        if r["peak_kb"] > base["peak_kb"] * (1 + tolerance) and r["peak_kb"] - base["peak_kb"] > min_kb:
+            regressions.append((name, "memory {}KiB -> {}KiB".format(base["peak_kb"], r["peak_kb"])))
+    return regressions
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("-k", help="Only run cases whose name contains this string.")
+    parser.add_argument("--repeat", help="Fresh runs per case; the best is kept.", type=int, default=3)
+    parser.add_argument("--output", help="Where to write results.", default="bench_results.json")
+    parser.add_argument("--baseline", help="Baseline to compare against.", default="bench_baseline.json")
+    parser.add_argument("--save-baseline", help="Write the results to the baseline file instead of comparing.", action="store_true")
+    parser.add_argument("--tolerance", help="Allowed slowdown as a fraction of the baseline.", type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = {}
+    for name, func, func_args in cases():
+        if args.k and args.k not in name:
+            continue
+        results[name] = measure(func, func_args, repeat=args.repeat)
+        print "{:50} {:9.4f}s {:9} KiB".format(name, results[name]["seconds"], results[name]["peak_kb"])
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print "Saved baseline to {}".format(args.baseline)
+        sys.exit(0)
+    if not os.path.exists(args.baseline):
+        print "No baseline at {}; run with --save-baseline to create one.".format(args.baseline)
+        sys.exit(0)
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f), tolerance=args.tolerance)
+    for name, change in regressions:
+        print "REGRESSION: {}: {}".format(name, change)
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,62 @@
+"""
+On-disk cache of per-shape arrays, stored as .npy files and memory-mapped
+on load so that every process on a host shares the same pages.
+
+The cache lives in $POLYTABLOID_CACHE (default ~/.cache/polytabloid);
+setting it to an empty string disables caching. Bumping FORMAT_VERSION
+invalidates every existing file.
+"""
+import os
+import tempfile
+import numpy as np
+
+FORMAT_VERSION = 1
+
+def cache_dir():
+    return os.environ.get("POLYTABLOID_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "polytabloid"))
+
+def cache_path(kind, shape):
+    name = "{}-v{}-{}.npy".format(kind, FORMAT_VERSION, "-".join(map(str, shape)))
+    return os.path.join(cache_dir(), name)
+
+def load(kind, shape):
+    """
+    Memory-map the cached array for shape, or return None if there is none.
+    """
+    if not cache_dir():
+        return None
+    try:
+        return np.load(cache_path(kind, shape), mmap_mode="r")
+    except (IOError, ValueError):
+        return None
+
+def write_atomic(path, write):
+    """
+    Call write with a file object for path. The file is written under a
+    temporary name and renamed into place, so concurrent readers (or a
+    later run, if this one is killed) never see a partial file.
+    """
+    dirname = os.path.dirname(path)
+    if not os.path.isdir(dirname):
+        try:
+            os.makedirs(dirname)
+        except OSError: # created by another process in the meantime
+            pass
+    fd, tmp = tempfile.mkstemp(dir=dirname, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.chmod(tmp, 0o644) # mkstemp makes files private; the cache is shared
+        os.rename(tmp, path)
+    except:
+        os.remove(tmp)
+        raise
+
+def store(kind, shape, array):
+    """
+    Write array to the cache and return it memory-mapped from there.
+    """
+    if not cache_dir():
+        return array
+    write_atomic(cache_path(kind, shape), lambda f: np.save(f, array))
+    return load(kind, shape)
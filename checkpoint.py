@@ -0,0 +1,73 @@
+"""
+Checkpoints for long single-shape solves, so that a solve which is killed
+can carry on from where it got to rather than starting again.
+
+A solver saves its state (for find_solution_new, the next index, the
+parity so far and the packed vector of pending flips; for the row-block
+solvers, the matrix columns computed so far) every INTERVAL seconds, to a file in
+the checkpoints directory of the cache keyed by shape, and removes it once
+the solve is finished. Saves are spaced out to at least ten times as long
+as the last one took, which keeps their cost to a few percent even when
+the state is large. Disabling the cache disables checkpoints too.
+"""
+import os
+import time
+import numpy as np
+import cache
+
+INTERVAL = 60.0
+
+def checkpoint_path(kind, shape):
+    name = "{}-v{}-{}.npz".format(kind, cache.FORMAT_VERSION, "-".join(map(str, shape)))
+    return os.path.join(cache.cache_dir(), "checkpoints", name)
+
+class Checkpoint(object):
+    def __init__(self, kind, shape, enabled=True):
+        self.path = checkpoint_path(kind, shape) if enabled and cache.cache_dir() else None
+        self.interval = INTERVAL
+        self.next_save = time.time() + self.interval
+
+    def load(self):
+        """
+        Dict of the arrays last saved, or None if there is no checkpoint.
+        """
+        if self.path is None:
+            return None
+        try:
+            with np.load(self.path) as data:
+                return dict(data.items())
+        except (IOError, ValueError):
+            return None
+
+    def due(self):
+        return self.path is not None and time.time() >= self.next_save
+
+    def save(self, **arrays):
+        if self.path is None:
+            return
+        start = time.time()
+        cache.write_atomic(self.path, lambda f: np.savez(f, **arrays))
+        self.next_save = time.time() + max(self.interval, 10 * (time.time() - start))
+
+    def clear(self):
+        if self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
+
+def load_columns(checkpoint, f):
+    """
+    The columns of an f x f matrix saved by save_columns, as a list of
+    row index arrays with None for those not yet computed.
+    """
+    columns = [None] * f
+    saved = checkpoint.load()
+    if saved is not None and len(saved["lengths"]) == f:
+        ends = np.cumsum(saved["lengths"])
+        for j in np.flatnonzero(saved["done"]):
+            columns[j] = saved["indices"][ends[j] - saved["lengths"][j]:ends[j]]
+    return columns
+
+def save_columns(checkpoint, columns):
+    lengths = np.array([0 if c is None else len(c) for c in columns], dtype=np.int64)
+    done = np.array([c is not None for c in columns], dtype=bool)
+    indices = np.concatenate([c for c in columns if c is not None] or [np.zeros(0, dtype=np.int64)])
+    checkpoint.save(lengths=lengths, done=done, indices=indices)
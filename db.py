@@ -0,0 +1,149 @@
+"""
+The results database: the specht table, its migrations, and queries.
+
+Besides n, the partition and its solution, each row stores the number of
+parts, the conjugate and the family flags of the partition, all filled in
+at insert time and indexed, so that queries can filter in SQL.
+
+The specht_metrics side table holds how each solve went (dimension, pair
+tests, per-phase timings), keyed by the partition that was solved.
+"""
+import sqlite3
+from partition import Partition
+
+# Columns added since the original (n, partition, solution) schema.
+EXTRA_COLUMNS = [
+    ("num_parts", "integer"),
+    ("conjugate", "text"),
+    ("is_hook", "integer"),
+    ("is_one_dimensional", "integer"),
+    ("is_self_conjugate", "integer"),
+]
+
+# Keys of instrument.Profile.metrics() kept in specht_metrics.
+METRIC_COLUMNS = [
+    ("dimension", "integer"),
+    ("pair_tests", "integer"),
+    ("enumerate_seconds", "real"),
+    ("pairs_seconds", "real"),
+    ("assemble_seconds", "real"),
+    ("solve_seconds", "real"),
+    ("wall_seconds", "real"),
+]
+
+INDEXED_COLUMNS = ["n", "solution", "num_parts", "conjugate", "is_hook", "is_one_dimensional", "is_self_conjugate"]
+
+FAMILIES = {
+    "hook": "is_hook = 1",
+    "1d": "is_one_dimensional = 1",
+    "self-conj": "is_self_conjugate = 1",
+    "none": "is_hook = 0 AND is_one_dimensional = 0 AND is_self_conjugate = 0",
+}
+FAMILY_ALIASES = {
+    "hooks": "hook",
+    "one dimensional": "1d",
+    "one-dimensional": "1d",
+    "self": "self-conj",
+    "self-conjugate": "self-conj",
+}
+
+def partition_str(p):
+    return ",".join(map(str, p.vals))
+
+def connect(path="data.db"):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    migrate(conn)
+    return conn
+
+def migrate(conn):
+    """
+    Bring the specht table up to date, adding any missing columns and
+    indexes and filling in the new columns of existing rows.
+    """
+    conn.execute("CREATE TABLE IF NOT EXISTS specht (n integer, partition text primary key, solution integer)")
+    existing = set(row[1] for row in conn.execute("PRAGMA table_info(specht)"))
+    for name, decl in EXTRA_COLUMNS:
+        if name not in existing:
+            conn.execute("ALTER TABLE specht ADD COLUMN {} {}".format(name, decl))
+    for name in INDEXED_COLUMNS:
+        conn.execute("CREATE INDEX IF NOT EXISTS specht_{0} ON specht ({0})".format(name))
+    conn.execute("CREATE TABLE IF NOT EXISTS specht_metrics (partition text primary key, n integer, {})".format(
+        ", ".join("{} {}".format(name, decl) for name, decl in METRIC_COLUMNS)))
+    conn.execute("CREATE INDEX IF NOT EXISTS specht_metrics_n ON specht_metrics (n)")
+    stale = conn.execute("SELECT n, partition, solution FROM specht WHERE num_parts IS NULL").fetchall()
+    if stale:
+        insert_solutions(conn, [(n, Partition(p_str), sol) for n, p_str, sol in stale])
+    conn.commit()
+
+def solution_row(n, p, solution):
+    return (n, partition_str(p), solution, len(p.vals), partition_str(p.conjugate()),
+            int(p.is_hook()), int(p.is_one_dimensional()), int(p.is_self_conjugate()))
+
+def insert_solutions(cur, solutions):
+    """
+    Insert (or replace) (n, Partition, solution) triples.
+    """
+    cur.executemany("INSERT OR REPLACE INTO specht (n, partition, solution, {}) VALUES (?,?,?,?,?,?,?,?)".format(
+        ", ".join(name for name, decl in EXTRA_COLUMNS)), (solution_row(*s) for s in solutions))
+
+def insert_metrics(cur, metrics):
+    """
+    Insert (or replace) (n, Partition, metrics dict) triples.
+    """
+    names = [name for name, decl in METRIC_COLUMNS]
+    cur.executemany("INSERT OR REPLACE INTO specht_metrics (partition, n, {}) VALUES (?,?,{})".format(
+        ", ".join(names), ",".join("?" * len(names))),
+        ([partition_str(p), n] + [m.get(name) for name in names] for n, p, m in metrics))
+
+def lookup_solution(cur, p):
+    """
+    Stored solution of p or of its conjugate, or None if neither is stored.
+    """
+    row = cur.execute("SELECT solution FROM specht WHERE partition IN (?, ?) LIMIT 1",
+                      (partition_str(p), partition_str(p.conjugate()))).fetchone()
+    return None if row is None else row[0]
+
+def family_clause(family):
+    family = family.lower()
+    family = FAMILY_ALIASES.get(family, family)
+    if family not in FAMILIES:
+        raise ValueError("Family not recognized. Please use 'hook', '1d', 'self-conj', or 'none'.")
+    return FAMILIES[family]
+
+def _where(partition=None, n=None, solution=None, family=None):
+    clauses, params = [], []
+    if partition is not None:
+        clauses.append("partition = ?")
+        params.append(partition)
+    if n is not None:
+        clauses.append("n = ?")
+        params.append(n)
+    if solution is not None:
+        clauses.append("solution = ?")
+        params.append(solution)
+    if family is not None:
+        clauses.append(family_clause(family))
+    if not clauses:
+        return "", params
+    return " WHERE " + " AND ".join(clauses), params
+
+def query(cur, **filters):
+    """
+    Rows (n, partition, solution, is_one_dimensional, is_hook,
+    is_self_conjugate) matching the given partition, n, solution and
+    family filters, streamed from a cursor.
+    """
+    where, params = _where(**filters)
+    return cur.execute("SELECT n, partition, solution, is_one_dimensional, is_hook, is_self_conjugate FROM specht" + where, params)
+
+def query_width(cur, **filters):
+    """
+    Length of the longest partition string matched by the filters.
+    """
+    where, params = _where(**filters)
+    return cur.execute("SELECT max(length(partition)) FROM specht" + where, params).fetchone()[0] or 0
+
+def max_n(cur):
+    return cur.execute("SELECT max(n) FROM specht").fetchone()[0]
@@ -0,0 +1,291 @@
+"""
+Linear algebra over GF(2).
+
+GF2Matrix is dense, with rows packed into uint64 words: column j of a row
+lives in word j // 64, bit j % 64, so each entry costs a single bit rather
+than the eight bytes of a float64 matrix. SparseGF2Matrix stores only the
+positions of the ones, column by column, and solves unit triangular
+systems (such as the polytabloid matrices) by substitution.
+"""
+import numpy as np
+from numpy.linalg import LinAlgError
+
+WORD_BITS = 64
+
+def num_words(n):
+    return (n + WORD_BITS - 1) // WORD_BITS
+
+def pack_rows(bits):
+    """
+    Pack a 2D array of 0/1 values into rows of uint64 words.
+    """
+    bits = np.asarray(bits, dtype=bool)
+    if bits.ndim == 1:
+        bits = bits[np.newaxis]
+    m, n = bits.shape
+    words = num_words(n)
+    padded = np.zeros((m, words * WORD_BITS), dtype=bool)
+    padded[:, :n] = bits
+    # packbits is big-endian within each byte, so reverse each group of 8.
+    packed = np.packbits(padded.reshape(m, words * 8, 8)[:, :, ::-1], axis=2)
+    return packed.reshape(m, words * 8).view("<u8").astype(np.uint64)
+
+def unpack_rows(words, n):
+    """
+    Inverse of pack_rows: returns an (m, n) boolean array.
+    """
+    words = np.ascontiguousarray(np.atleast_2d(words), dtype="<u8")
+    m = words.shape[0]
+    bits = np.unpackbits(words.view(np.uint8).reshape(m, -1, 1), axis=2)[:, :, ::-1]
+    return bits.reshape(m, -1)[:, :n].astype(bool)
+
+def _bit(j):
+    return j >> 6, np.uint64(1) << np.uint64(j & 63)
+
+class GF2Matrix(object):
+    def __init__(self, nrows, ncols, words=None):
+        if words is None:
+            words = np.zeros((nrows, num_words(ncols)), dtype=np.uint64)
+        assert words.shape == (nrows, num_words(ncols))
+        self.nrows = nrows
+        self.ncols = ncols
+        self.words = words
+
+    @classmethod
+    def from_dense(cls, matrix):
+        matrix = np.atleast_2d(np.asarray(matrix)) % 2
+        nrows, ncols = matrix.shape
+        return cls(nrows, ncols, pack_rows(matrix))
+
+    @classmethod
+    def from_columns(cls, columns):
+        """
+        Equivalent of numpy.column_stack for a list of 0/1 vectors.
+        """
+        columns = np.asarray(columns) % 2
+        return cls(columns.shape[0], columns.shape[1], pack_rows(columns)).transpose()
+
+    @property
+    def shape(self):
+        return (self.nrows, self.ncols)
+
+    def __getitem__(self, index):
+        i, j = index
+        w, mask = _bit(j)
+        return int(self.words[i, w] & mask != 0)
+
+    def set(self, i, j, value=1):
+        w, mask = _bit(j)
+        if value % 2:
+            self.words[i, w] |= mask
+        else:
+            self.words[i, w] &= ~mask
+
+    def flip(self, i, j):
+        w, mask = _bit(j)
+        self.words[i, w] ^= mask
+
+    def copy(self):
+        return GF2Matrix(self.nrows, self.ncols, self.words.copy())
+
+    def to_dense(self):
+        return unpack_rows(self.words, self.ncols).astype(np.uint8)
+
+    def __iter__(self):
+        for i in range(self.nrows):
+            yield unpack_rows(self.words[i], self.ncols)[0].astype(int).tolist()
+
+    def __eq__(self, other):
+        return self.shape == other.shape and np.array_equal(self.words, other.words)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __str__(self):
+        return str(self.to_dense())
+
+    def transpose(self):
+        # Work through 64 rows at a time so only one block is ever unpacked.
+        out = GF2Matrix(self.ncols, self.nrows)
+        for start in range(0, self.nrows, WORD_BITS):
+            block = unpack_rows(self.words[start:start + WORD_BITS], self.ncols)
+            out.words[:, start // WORD_BITS] = pack_rows(block.T)[:, 0]
+        return out
+
+    def _eliminate(self, rhs=None):
+        """
+        Gauss-Jordan elimination in place, using row XORs.
+        Returns the rank of the matrix.
+        """
+        words = self.words
+        rank = 0
+        for j in range(self.ncols):
+            if rank == self.nrows:
+                break
+            w, mask = _bit(j)
+            col = (words[:, w] & mask) != 0
+            below = np.flatnonzero(col[rank:])
+            if len(below) == 0:
+                continue
+            p = rank + below[0]
+            if p != rank:
+                words[[rank, p]] = words[[p, rank]]
+                col[[rank, p]] = col[[p, rank]]
+                if rhs is not None:
+                    rhs[[rank, p]] = rhs[[p, rank]]
+            col[rank] = False
+            hits = np.flatnonzero(col)
+            if len(hits):
+                words[hits] ^= words[rank]
+                if rhs is not None:
+                    rhs[hits] ^= rhs[rank]
+            rank += 1
+        return rank
+
+    def rank(self):
+        return self.copy()._eliminate()
+
+    def solve(self, b):
+        """
+        Solve self * x = b over GF(2) for a square, non-singular matrix.
+        Returns x as a uint8 vector of 0s and 1s.
+        """
+        if self.nrows != self.ncols:
+            raise LinAlgError("Last 2 dimensions of the array must be square")
+        rhs = np.array(b, dtype=np.uint8) % 2
+        if rhs.shape != (self.nrows,):
+            raise ValueError("Right-hand side has shape {}, expected ({},)".format(rhs.shape, self.nrows))
+        if self.copy()._eliminate(rhs) < self.ncols:
+            raise LinAlgError("Singular matrix")
+        return rhs
+
+def sparse_rows(words, ncols):
+    """
+    Column indices of the ones in each row of a block of packed rows.
+    """
+    return [np.flatnonzero(row) for row in unpack_rows(words, ncols)]
+
+class SparseGF2Matrix(object):
+    """
+    Compressed sparse column form: the rows of the ones in column j are
+    indices[indptr[j]:indptr[j + 1]], in increasing order.
+    """
+    def __init__(self, nrows, ncols, indptr, indices):
+        assert len(indptr) == ncols + 1
+        self.nrows = nrows
+        self.ncols = ncols
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+
+    @classmethod
+    def from_columns(cls, nrows, columns):
+        """
+        Build from a list of row index sequences, one per column.
+        """
+        columns = [np.unique(np.asarray(c, dtype=np.int64)) for c in columns]
+        indptr = np.zeros(len(columns) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(c) for c in columns])
+        indices = np.concatenate(columns) if columns else np.zeros(0, dtype=np.int64)
+        return cls(nrows, len(columns), indptr, indices)
+
+    @classmethod
+    def from_dense(cls, matrix):
+        matrix = np.atleast_2d(np.asarray(matrix)) % 2
+        return cls.from_columns(matrix.shape[0], [np.flatnonzero(col) for col in matrix.T])
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            nrows, ncols = data["shape"]
+            return cls(int(nrows), int(ncols), data["indptr"], data["indices"])
+
+    def save(self, path):
+        """
+        Write to a compressed .npz file, which load reads back.
+        """
+        np.savez_compressed(path, shape=np.array(self.shape), indptr=self.indptr, indices=self.indices)
+
+    @property
+    def shape(self):
+        return (self.nrows, self.ncols)
+
+    @property
+    def nnz(self):
+        return len(self.indices)
+
+    def column(self, j):
+        return self.indices[self.indptr[j]:self.indptr[j + 1]]
+
+    def _column_of_entries(self):
+        return np.repeat(np.arange(self.ncols), np.diff(self.indptr))
+
+    def __getitem__(self, index):
+        i, j = index
+        col = self.column(j)
+        k = np.searchsorted(col, i)
+        return int(k < len(col) and col[k] == i)
+
+    def to_dense(self):
+        dense = np.zeros(self.shape, dtype=np.uint8)
+        dense[self.indices, self._column_of_entries()] = 1
+        return dense
+
+    def to_gf2(self):
+        return GF2Matrix.from_dense(self.to_dense())
+
+    def __iter__(self):
+        for row in self.to_dense():
+            yield row.astype(int).tolist()
+
+    def __eq__(self, other):
+        if isinstance(other, SparseGF2Matrix):
+            return (self.shape == other.shape and np.array_equal(self.indptr, other.indptr)
+                    and np.array_equal(self.indices, other.indices))
+        return self.shape == other.shape and np.array_equal(self.to_dense(), other.to_dense())
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __str__(self):
+        if self.nrows * self.ncols > 10 ** 6:
+            return "<{}x{} sparse GF(2) matrix with {} ones>".format(self.nrows, self.ncols, self.nnz)
+        return str(self.to_dense())
+
+    def triangular(self):
+        """
+        "lower" or "upper" if the matrix is unit triangular, else None.
+        """
+        if self.nrows != self.ncols:
+            return None
+        cols = self._column_of_entries()
+        diagonal = np.zeros(self.ncols, dtype=bool)
+        diagonal[self.indices[self.indices == cols]] = True
+        if not diagonal.all():
+            return None
+        if (self.indices >= cols).all():
+            return "lower"
+        if (self.indices <= cols).all():
+            return "upper"
+        return None
+
+    def solve(self, b):
+        """
+        Solve self * x = b over GF(2), returning x as a uint8 vector. Unit
+        triangular matrices are solved by substitution in O(nnz); anything
+        else is handed to GF2Matrix.solve.
+        """
+        if self.nrows != self.ncols:
+            raise LinAlgError("Last 2 dimensions of the array must be square")
+        rhs = np.array(b, dtype=np.uint8) % 2
+        if rhs.shape != (self.nrows,):
+            raise ValueError("Right-hand side has shape {}, expected ({},)".format(rhs.shape, self.nrows))
+        kind = self.triangular()
+        if kind is None:
+            return self.to_gf2().solve(rhs)
+        order = range(self.ncols) if kind == "lower" else range(self.ncols - 1, -1, -1)
+        for j in order:
+            # x[j] is final once the earlier columns are substituted
+            if rhs[j]:
+                rhs[self.column(j)] ^= 1
+                rhs[j] = 1
+        return rhs
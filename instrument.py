@@ -0,0 +1,62 @@
+"""
+Per-phase instrumentation for the solvers. Solvers time their phases
+(enumeration, pair tests, matrix assembly, solve) and count their work into
+the module-level profile, which callers reset before a solve and read after.
+
+Phases are timed as whole blocks rather than per pair, so leaving the
+instrumentation on costs next to nothing.
+"""
+from contextlib import contextmanager
+import time
+
+PHASES = ("enumerate", "pairs", "assemble", "solve")
+
+class Profile(object):
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.seconds = dict((phase, 0.0) for phase in PHASES)
+        self.counts = {}
+        self.started = time.time()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + time.time() - start
+
+    def count(self, name, k=1):
+        self.counts[name] = self.counts.get(name, 0) + k
+
+    def set(self, name, value):
+        self.counts[name] = value
+
+    def wall(self):
+        return time.time() - self.started
+
+    def metrics(self):
+        """
+        Flat dict of everything recorded since the last reset.
+        """
+        metrics = dict(("{}_seconds".format(phase), s) for phase, s in self.seconds.items())
+        metrics.update(self.counts)
+        metrics["wall_seconds"] = self.wall()
+        return metrics
+
+def report(metrics):
+    """
+    Human-readable breakdown of a metrics dict.
+    """
+    wall = metrics.get("wall_seconds") or 0.0
+    lines = ["  dimension {}, pair tests {}, wall time {:.3f}s".format(
+        metrics.get("dimension", "?"), metrics.get("pair_tests", 0), wall)]
+    for phase in PHASES:
+        s = metrics.get("{}_seconds".format(phase), 0.0)
+        share = 100 * s / wall if wall else 0.0
+        lines.append("  {:10} {:9.3f}s {:5.1f}%".format(phase, s, share))
+    return "\n".join(lines)
+
+profile = Profile()
@@ -0,0 +1,27 @@
+"""
+Bounded least-recently-used mapping, for the in-process caches of the
+solvers (see polytabloid.standards_array) and of solutions (see
+solutions.py).
+"""
+from collections import OrderedDict
+
+class LRUCache(object):
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key, default=None):
+        if key not in self._items:
+            return default
+        value = self._items.pop(key) # reinserted as the most recently used
+        self._items[key] = value
+        return value
+
+    def put(self, key, value):
+        self._items.pop(key, None)
+        self._items[key] = value
+        if len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
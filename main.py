@@ -1,44 +1,43 @@
-from polytabloid import find_solution_new
-from tasks import app, find_solution_concurrent
-from partition import partition_gen, Partition
+# Only the database and partition modules are loaded up front, so that
+# queries start instantly; solver backends are imported when automation
+# actually needs one (see backends.py).
 from argparse import ArgumentParser
-import sqlite3
+import backends
+import db
+from partition import Partition
 import sys
 
-def print_query(query, families=False, pad=1):
-    if type(query) in (sqlite3.Cursor, list):
-        longest = ""
-        results = []
-        for q in query:
-            results.append(q)
-            longest = max((q[1], longest), key=len) # to ensure proper padding
-        for r in results:
-            print_query(r, families=families, pad=len(longest))
-        return
-    n, p_str, sol = query
-    family = ""
-    if families:
-        _p = Partition(*map(int, p_str.split(",")))
-        if _p.is_one_dimensional():
-            family = "[1D]"
-        if _p.is_hook():
-            family = "[HOOK]"
-        elif _p.is_self_conjugate():
-            family = "[SELF-CONJ]"
-    print u"{:{pad}} \u22a2 {:2}: solution {} {}".format("(" + p_str + ")", n, sol, family, pad=pad+2).encode("utf-8") 
+def print_query(rows, families=False, pad=1):
+    for n, p_str, sol, one_d, hook, self_conj in rows:
+        family = ""
+        if families:
+            if one_d:
+                family = "[1D]"
+            if hook:
+                family = "[HOOK]"
+            elif self_conj:
+                family = "[SELF-CONJ]"
+        print u"{:{pad}} \u22a2 {:2}: solution {} {}".format("(" + p_str + ")", n, sol, family, pad=pad+2).encode("utf-8") 
+
+def print_matches(cur, families=False, **filters):
+    # padding is found in SQL first, so that rows can be printed as they stream in
+    pad = db.query_width(cur, **filters)
+    print_query(db.query(cur, **filters), families=families, pad=pad)
 
 if __name__ == "__main__":
-    conn = sqlite3.connect('data.db')
+    # Initial database setup (and migration of older databases)
+    conn = db.connect('data.db')
     cur = conn.cursor()
 
-    # Initial database setup
-    cur.execute("CREATE TABLE IF NOT EXISTS specht (n integer, partition text primary key, solution integer)")
-    conn.commit()
-
     parser = ArgumentParser()
     parser.add_argument("--verbosity", help="Print additional status info while running.", type=int, default=0)
     parser.add_argument("--regen", help="Begin automation, overwriting previous database contents.", action="store_true")
-    parser.add_argument("-c", help="Begin concurrent computation (ensure Redis and huey_consumer.py are running!)", action="store_true")
+    parser.add_argument("-c", help="Begin concurrent computation (with the celery backend, ensure Redis and the Celery worker are running!)", action="store_true")
+    parser.add_argument("--backend", help="Backend for concurrent computation: 'celery', a local process 'pool' per partition, 'tiled' out of core, or 'local' (the default without -c: one partition per process).", choices=backends.names(), default="celery")
+    parser.add_argument("--in-flight", help="Number of partitions kept queued on the celery workers at once during automation.", type=int, default=4)
+    parser.add_argument("--processes", help="Number of worker processes for the pool backend (default: all cores).", type=int)
+    parser.add_argument("-j", "--jobs", help="Number of partitions to solve in parallel during automation (default: all cores).", type=int)
+    parser.add_argument("--profile", help="Print a per-phase time breakdown of each partition solved during automation.", action="store_true")
     parser.add_argument("-p", help="Query by partition.", nargs="+")
     parser.add_argument("-n", help="Query by number being partitioned.", type=int)
     parser.add_argument("-s", help="Query by solution value.", type=int)
@@ -48,89 +47,53 @@ if __name__ == "__main__":
     args = parser.parse_args()
 
     if args.a:
-        query = cur.execute("SELECT * FROM specht")
-        print_query(query, families=args.sf)
+        print_matches(cur, families=args.sf)
         sys.exit(0)
 
     elif args.p:
         p_str = ",".join(args.p)
-        query = cur.execute("SELECT * FROM specht WHERE partition=?", (p_str,)).fetchone()
+        query = db.query(cur, partition=p_str).fetchone()
+        if query == None:
+            # not stored yet: answered by its family, or solved and stored
+            p = Partition(*map(int, p_str.split(",")))
+            if p.is_2special() and p.conjugate().is_2special():
+                from solutions import cached_solution
+                query = (sum(p.vals), p_str, cached_solution(p, conn),
+                         p.is_one_dimensional(), p.is_hook(), p.is_self_conjugate())
         if query == None:
-            print "No data found for ({}). Either the partition/conjugate is not 2-special or it is greater than the current maximum.".format(p_str)
+            print "No data found for ({}): either the partition or its conjugate is not 2-special.".format(p_str)
         else:
-            print_query(query, families=args.sf)
+            print_query([query], families=args.sf, pad=len(p_str))
         sys.exit(0)
 
 
     elif args.f:
-        if args.s:
-            query = cur.execute("SELECT * FROM specht WHERE solution=?", (args.s,))
-        elif args.n:
-            query = cur.execute("SELECT * FROM specht WHERE n=?", (args.n,))
-        else:
-            query = cur.execute("SELECT * FROM specht")
-        if args.f.lower() in ("hook", "hooks"):
-            _match = (lambda p: p.is_hook())
-        elif args.f.lower() in ("1d", "one dimensional", "one-dimensional"):
-            _match = (lambda p: p.is_one_dimensional())
-        elif args.f.lower() in ("self", "self-conj", "self-conjugate"):
-            _match = (lambda p: p.is_self_conjugate())
-        elif args.f.lower() == "none":
-            _match = (lambda p: not p.is_self_conjugate() and not p.is_one_dimensional() and not p.is_hook())
-        else:
-            print "Family not recognized. Please use 'hook', '1d', 'self-conj', or 'none'."
+        try:
+            db.family_clause(args.f)
+        except ValueError as e:
+            print e
             sys.exit(1)
-        match = [(n, p_str, sol) for n, p_str, sol in query if _match(Partition(p_str))]
-        print_query(match, families=args.sf)
+        print_matches(cur, families=args.sf, n=args.n, solution=args.s, family=args.f)
         sys.exit(0)
 
     elif args.s:
-        query = cur.execute("SELECT * FROM specht WHERE solution=?", (args.s,))
-        print_query(query, families=args.sf)
+        print_matches(cur, families=args.sf, solution=args.s)
         sys.exit(0)
 
     elif args.n:
-        query = cur.execute("SELECT * FROM specht WHERE n=?", (args.n,))
-        print_query(query, families=args.sf)
-        max_n = cur.execute("SELECT max(n) FROM specht").fetchone()[0]
-        if args.n >= max_n:
+        print_matches(cur, families=args.sf, n=args.n)
+        if args.n >= db.max_n(cur):
             print "WARNING: given n is greater than or equal to maximum in database. Above list may be incomplete."
         sys.exit(0)
 
     # Automation mode:
-    # find the the largest n currently in the database,
-    # and figure out which partitions of n still need to be generated.
-    n = cur.execute("SELECT max(n) FROM specht").fetchone()[0]
-    if args.regen or not n:
-        n = 2 
-    while True:
-        p_gen = partition_gen(n)
-        for p in p_gen:
-            p = Partition(*p)
-            p2 = p.conjugate()
-            if p.is_2special() and p2.is_2special():
-                p_str = ",".join(map(str, p.vals))
-                p2_str = ",".join(map(str, p2.vals))
-                # see if candidate or conjugate is already in db; otherwise compute & insert solution.
-                in_db = cur.execute("SELECT * FROM specht WHERE partition=?", (p_str,)).fetchone()
-                if in_db != None and not args.regen: # with --regen, override existing db contents
-                    continue
-                if p.num_row_perms() > p2.num_row_perms():
-                    faster_p = p
-                else:
-                    faster_p = p2
-                if args.verbosity > 0:
-                    print "Next partition: {}".format(faster_p)
-                if args.c:
-                    print 1
-                    solution = find_solution_concurrent(faster_p, verbosity=args.verbosity)
-                    print 1
-                else:
-                    solution = find_solution_new(faster_p, verbosity=args.verbosity)
-                # conjugate has same solution, so insert both
-                cur.execute("INSERT OR REPLACE INTO specht VALUES (?,?,?),(?,?,?)", (n, p_str, solution % 2, n, p2_str, solution % 2))
-                if args.verbosity > 0:
-                    print "Inserting ({}, {}, {})".format(n, p_str, solution % 2)
-                    print "Inserting ({}, {}, {})".format(n, p2_str, solution % 2)
-                conn.commit()
-        n += 1
+    # find the lowest n with partitions still to be generated (normally the
+    # largest n in the database, unless an interrupted run left gaps).
+    from automation import automate, resume_from
+    n = 2 if args.regen else resume_from(cur)
+    options = backends.load(args.backend if args.c else "local", jobs=args.jobs, processes=args.processes,
+                            in_flight=args.in_flight, verbosity=args.verbosity)
+    try:
+        automate(conn, n, regen=args.regen, verbosity=args.verbosity, profile=args.profile, **options)
+    except KeyboardInterrupt:
+        sys.exit(1)
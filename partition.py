@@ -1,37 +1,83 @@
 from math import factorial
+from weakref import WeakValueDictionary
 
 class Partition(object):
-    def __init__(self, *vals):
+    """
+    Partitions are interned: constructing the same partition twice, while
+    the first is still referenced, gives the same object, so derived data
+    (conjugate, family checks, row permutations, dimension) is computed at
+    most once per live partition.
+    """
+    __slots__ = ("vals", "_cache", "__weakref__")
+    _interned = WeakValueDictionary()
+
+    def __new__(cls, *vals):
         if type(vals[0]) in [str, unicode]:
-            self.vals = tuple(map(int, vals[0].split(",")))
+            vals = tuple(map(int, vals[0].split(",")))
         else:
-            self.vals = tuple(sorted(vals))[::-1]
+            vals = tuple(sorted(vals))[::-1]
+        p = cls._interned.get(vals)
+        if p is None:
+            p = object.__new__(cls)
+            p.vals = vals
+            p._cache = {}
+            cls._interned[vals] = p
+        return p
+
+    def __reduce__(self):
+        return (Partition, self.vals)
 
     def __str__(self):
         return str(self.vals)
 
+    def __repr__(self):
+        return "Partition{}".format(self.vals)
+
     def __eq__(self, other):
-        return self.vals == other.vals
+        return isinstance(other, Partition) and self.vals == other.vals
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.vals)
+
+    def _cached(self, key, compute):
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
 
     def conjugate(self):
-        _vals = [v for v in self.vals]
-        con = []
-        while len(_vals) > 0:
-            l = len(_vals)
-            v = _vals.pop()
-            con += [l] * v
-            _vals = [x - v for x in _vals]
-        return Partition(*con)
+        return self._cached("conjugate", self._conjugate)
+
+    def _conjugate(self):
+        con = [sum(1 for v in self.vals if v > c) for c in range(self.vals[0])]
+        p = Partition(*con)
+        p._cache.setdefault("conjugate", self)
+        return p
 
     def num_row_perms(self):
         # lambda' has same num of row permutations as lambda has col perms,
         # so we can figure out which is faster to compute.
+        return self._cached("num_row_perms", self._num_row_perms)
+
+    def _num_row_perms(self):
         total = 1
         for row in self.vals:
             total *= factorial(row)
         return total
 
+    def dimension(self):
+        """
+        Number of standard tableaux of this shape, i.e. the dimension of
+        the Specht module.
+        """
+        return self._cached("dimension", lambda: dimension(self.vals))
+
     def is_2special(self):
+        return self._cached("is_2special", self._is_2special)
+
+    def _is_2special(self):
         for i,v in enumerate(self.vals):
             if i < len(self.vals) - 1:
                 next_v = self.vals[i+1]
@@ -41,12 +87,18 @@ class Partition(object):
         return True
     
     def is_hook(self):
+        return self._cached("is_hook", self._is_hook)
+
+    def _is_hook(self):
         if len(self.vals) > 1:
             if self.vals[1:] == (1,) * (sum(self.vals) - self.vals[0]):
                 return True
         return False
 
     def is_one_dimensional(self):
+        return self._cached("is_one_dimensional", self._is_one_dimensional)
+
+    def _is_one_dimensional(self):
         if len(self.vals) == 1:
             return True
         for r in self.vals:
@@ -55,18 +107,55 @@ class Partition(object):
         return True
 
     def is_self_conjugate(self):
-        return self == self.conjugate()
+        return self is self.conjugate()
+
+def known_solution(p):
+    """
+    (family, solution) if p is in a family whose solution is known in
+    closed form (one-dimensional, self-conjugate or hook), else None.
+    """
+    if p.is_one_dimensional():
+        return "1D", 1
+    if p.is_self_conjugate():
+        return "self-conjugate", 0
+    if p.is_hook():
+        i = sum(p.vals)
+        r = p.vals[1:].count(1)
+        choose = factorial(i - 1) / (factorial(r) * factorial(i - 1 - r))
+        if (i % 2, r % 2, choose % 2) == (1, 0, 1):
+            return "hook", 1
+        return "hook", 0
+    return None
 
 def least_greater_power(x, y):
     """
     Returns least positive integer n such that x^n > y.
     """
+    if x == 2 and y >= 0:
+        return y.bit_length()
     n = 0
     while True:
         if x ** n > y:
             return n
         n += 1
 
+_dimensions = {}
+
+def dimension(shape):
+    """
+    Number of standard tableaux of the given shape, by the hook length formula.
+    """
+    shape = tuple(r for r in shape if r > 0)
+    if shape in _dimensions:
+        return _dimensions[shape]
+    cols = [sum(1 for row in shape if row > c) for c in range(shape[0] if shape else 0)]
+    hooks = 1
+    for r, row in enumerate(shape):
+        for c in range(row):
+            hooks *= (row - c) + (cols[c] - r) - 1
+    _dimensions[shape] = factorial(sum(shape)) // hooks
+    return _dimensions[shape]
+
 def partition_gen(n):
     """
     accel_asc - Fastest known algorithm for computing partitions of an integer n.
@@ -93,6 +182,40 @@ def partition_gen(n):
         y = x + y - 1
         yield a[:k + 1][::-1]
 
+def trailing_ones(v):
+    return (v ^ (v + 1)).bit_length() - 1
+
+def _two_special_parts(remaining, largest):
+    # A part v may only be followed by parts below 2 ** trailing_ones(v),
+    # so whole branches are cut as soon as a part breaks the condition.
+    if remaining == 0:
+        yield ()
+        return
+    for part in range(min(remaining, largest), 0, -1):
+        bound = min(part, (1 << trailing_ones(part)) - 1)
+        if bound == 0 and part < remaining:
+            continue
+        for rest in _two_special_parts(remaining - part, bound):
+            yield (part,) + rest
+
+def two_special_pairs(n):
+    """
+    Generates each pair of 2-special partitions of n which are conjugate
+    to each other, once, as (partition, conjugate). The partition is the
+    one with more row permutations, i.e. fewer column permutations to walk
+    in find_solution; automation picks the side it solves with its cost
+    model instead (see schedule.py).
+    """
+    for parts in _two_special_parts(n, n):
+        p = Partition(*parts)
+        p2 = p.conjugate()
+        if p2.vals > p.vals or not p2.is_2special():
+            continue # conjugates with larger vals are yielded as p
+        if p.num_row_perms() > p2.num_row_perms():
+            yield p, p2
+        else:
+            yield p2, p
+
 def hooks_gen(n):
     """
     Generates all hook partitions of an integer n,
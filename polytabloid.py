@@ -1,19 +1,94 @@
 #!/usr/bin/env/python
 # -*- coding: utf-8 -*-
 from argparse import ArgumentParser
-from itertools import permutations, product
+from itertools import combinations, islice, permutations, product
 from copy import copy
-from numpy import column_stack, linalg
+from heapq import heappop, heappush
 from math import factorial
-from partition import Partition
+import os
+import shutil
+import tempfile
+import numpy as np
+from partition import Partition, dimension, known_solution
+from gf2 import SparseGF2Matrix, num_words, pack_rows, unpack_rows
+import cache
+from checkpoint import Checkpoint
+from lru import LRUCache
+from instrument import profile
+
+class ShapeTable(object):
+    """
+    Position lookups shared by every tableau of a given shape. Positions are
+    indices into Tableaux.vals, i.e. cells numbered along rows.
+    """
+    __slots__ = ("shape", "size", "row_starts", "index_coords", "index_rows", "column_indices", "straightened")
+
+    def __init__(self, shape):
+        self.shape = shape
+        self.size = sum(shape)
+        self.row_starts = []
+        self.index_coords = []
+        start = 0
+        for r, length in enumerate(shape):
+            self.row_starts.append(start)
+            self.index_coords += [(r, c) for c in range(length)]
+            start += length
+        self.index_rows = [r for r, c in self.index_coords]
+        self.column_indices = []
+        for c in range(shape[0] if shape else 0):
+            self.column_indices.append([self.row_starts[r] + c for r, length in enumerate(shape) if c < length])
+        # straightening memo per modulus (see _straighten)
+        self.straightened = {}
+
+    def index(self, r, c):
+        """
+        Position of the cell (r, c); raises IndexError if it is not in the shape.
+        """
+        if r < 0 or r >= len(self.shape) or c < 0 or c >= self.shape[r]:
+            raise IndexError("({}, {}) is outside of shape {}".format(r, c, self.shape))
+        return self.row_starts[r] + c
+
+_shape_tables = {}
+
+def shape_table(shape):
+    shape = tuple(shape)
+    table = _shape_tables.get(shape)
+    if table is None:
+        table = _shape_tables[shape] = ShapeTable(shape)
+    return table
 
 class Tableaux(object):
+    __slots__ = ("shape", "table", "_vals", "_positions")
+
     def __init__(self, shape, vals=None):
-        if not vals:
-            vals = range(1, sum(shape) + 1)
-        assert sum(shape) == len(vals)
-        self.vals = list(vals)
-        self.shape = shape
+        self.table = shape_table(shape)
+        self.shape = self.table.shape
+        if vals is None:
+            vals = range(1, self.table.size + 1)
+        assert self.table.size == len(vals)
+        self.vals = vals
+
+    @property
+    def vals(self):
+        return self._vals
+
+    @vals.setter
+    def vals(self, vals):
+        self._vals = list(vals)
+        self._positions = None
+
+    @property
+    def positions(self):
+        """
+        Inverse of vals: positions[k] is the index of the value k in vals.
+        Built on first use and dropped whenever vals is reassigned.
+        """
+        if self._positions is None:
+            positions = [None] * (max(self._vals) + 1 if self._vals else 0)
+            for i in range(len(self._vals) - 1, -1, -1):
+                positions[self._vals[i]] = i
+            self._positions = positions
+        return self._positions
 
     def __str__(self):
         rows = self.rows()
@@ -34,49 +109,25 @@ class Tableaux(object):
         Convert an index i of self.vals into (row, col) coords of the 
         position of self.vals[i].
         """
-        if i > sum(self.shape):
-            return False
-        for r,length in enumerate(self.shape):
-            if i < length:
-                return (r, i)
-            i -= length 
+        if 0 <= i < self.table.size:
+            return self.table.index_coords[i]
         return False #not found
 
     def coords(self, r, c):
         if r < 0:
             return None
-        if r == 0:
-            return self.vals[c]
-        rows = self.rows()
-        for i in range(r + 1):
-            row = next(rows)
-        return row[c]
+        return self._vals[self.table.index(r, c)]
 
     def rows(self, indices=False):
-        start = 0
-        for i,row in enumerate(self.shape):
-            if i > 0:
-                prev = self.shape[i-1]
-                if indices:
-                    yield range(start, start + row)
-                else:
-                    yield self.vals[start : start + row]
+        for start, row in zip(self.table.row_starts, self.shape):
+            if indices:
+                yield range(start, start + row)
             else:
-                if indices:
-                    yield range(row)
-                else:
-                    yield self.vals[0:row]
-            start += row
+                yield self._vals[start : start + row]
     
     def columns(self):
-        for i in range(self.shape[0]):
-            col, x = [], 0
-            for row in self.shape:
-                if i + 1 > row:
-                    break
-                col.append(self.vals[i + x])
-                x += row
-            yield col
+        for col in self.table.column_indices:
+            yield [self._vals[i] for i in col]
 
     def sort_rows(self):
         new_vals = []
@@ -108,7 +159,7 @@ class Tableaux(object):
         if len(args) == 1:
             return self #identity permutation (need to make a copy?)
         for i,num in enumerate(args):
-            j = self.vals.index(num)
+            j = self.positions[num]
             if i < len(args) - 1:
                 new_vals[j] = args[i + 1]
             else:
@@ -139,158 +190,765 @@ class Tableaux(object):
             elif t.is_standard():
                 yield t
 
+    def straighten(self, modulus=None):
+        """
+        Express the polytabloid of self in the basis of standard polytabloids
+        via Garnir relations. Returns a dict mapping standard Tableaux to
+        their non-zero coefficients, over the integers or, given a modulus
+        such as 2, over the integers mod modulus.
+        """
+        vals, sign = _sort_columns(self.table, self.vals)
+        expansion = {}
+        _add(expansion, _straighten(self.table, vals, modulus), sign, modulus)
+        return dict((Tableaux(self.shape, vals), coeff) for vals, coeff in expansion.items())
+
     def generates(self, other):
-        mapping = {}
-        for i,k in enumerate(self.vals):
-            self_r, self_c = self.coords_of_index(i)
-            other_r, other_c = other.coords_of_index(other.vals.index(k))
+        table = self.table
+        index_rows = table.index_rows
+        other_positions = other.positions
+        mapping = set()
+        for i,k in enumerate(self._vals):
+            self_r = index_rows[i]
+            other_r = index_rows[other_positions[k]]
             if self_r == other_r:
                 target = k
             else:
-                try:
-                    target = self.coords(other_r, self_c)
-                except IndexError: # required column permutation is impossible
+                self_c = i - table.row_starts[self_r]
+                if self_c >= self.shape[other_r]: # required column permutation is impossible
                     return False
-            if mapping.get(target): # is this value already being mapped to?
+                target = self._vals[table.row_starts[other_r] + self_c]
+            if target in mapping: # is this value already being mapped to?
                 return False
-            mapping[target] = True
+            mapping.add(target)
         return True
 
-def total_order(shape, t=None, adding=None):
-    # generates all standard tableaux, in order.
-    if not adding:
-        adding = sum(shape)
-    if not t:
-        t = Tableaux(shape, vals=[0] * adding)
-    rows = [r for r in t.rows()]
-    for i,k in enumerate(t.vals):
-        if k != 0:
-            #print "k nonzero"
+def permutation_sign(seq):
+    inversions = sum(1 for i in range(len(seq)) for j in range(i + 1, len(seq)) if seq[i] > seq[j])
+    return -1 if inversions % 2 else 1
+
+def _sort_columns(table, vals, columns=None):
+    """
+    Sort each column of vals (or just the given columns) into increasing
+    order, returning the new vals and the sign of the column permutation
+    used.
+    """
+    vals, sign = list(vals), 1
+    for c in range(len(table.column_indices)) if columns is None else columns:
+        col = table.column_indices[c]
+        entries = [vals[i] for i in col]
+        sign *= permutation_sign(entries)
+        for i, k in zip(col, sorted(entries)):
+            vals[i] = k
+    return tuple(vals), sign
+
+def _row_descent(table, vals):
+    for r, (start, length) in enumerate(zip(table.row_starts, table.shape)):
+        for c in range(length - 1):
+            if vals[start + c] > vals[start + c + 1]:
+                return r, c
+    return None
+
+def _add(expansion, terms, factor, modulus):
+    """
+    expansion += factor * terms in place, reducing by modulus as it goes
+    and dropping the terms that cancel.
+    """
+    for k, v in terms.items():
+        v = expansion.get(k, 0) + factor * v
+        if modulus:
+            v %= modulus
+        if v:
+            expansion[k] = v
+        else:
+            expansion.pop(k, None)
+
+def _column_order(table, vals):
+    # a linear extension of the dominance order on column tabloids: the
+    # largest entry placed differently decides, the one further right
+    # being greater
+    columns = [0] * (table.size + 1)
+    for i, k in enumerate(vals):
+        columns[k] = i - table.row_starts[table.index_rows[i]]
+    return tuple(reversed(columns))
+
+def _garnir(table, vals, descent):
+    """
+    Yields (vals, coefficient) such that e_t is the sum of coefficient *
+    e_vals, for t given by column-sorted vals with a row descent, and each
+    vals column-sorted. With A the entries of column c from row r down and
+    B those of column c+1 down to row r, for the descent t[r][c] >
+    t[r][c+1], summing sgn(p) e_pt over coset representatives p of S_A x
+    S_B in S_(A+B) gives zero, and the identity coset gives e_t. Every
+    other term moves entries of A right (and the smaller ones of B left),
+    so is later than t in column order.
+    """
+    r, c = descent
+    a_pos = table.column_indices[c][r:]
+    b_pos = table.column_indices[c + 1][:r + 1]
+    positions = a_pos + b_pos
+    entries = [vals[i] for i in positions]
+    identity = tuple(range(len(a_pos)))
+    offset = sum(identity)
+    for chosen in combinations(range(len(positions)), len(a_pos)):
+        if chosen == identity:
             continue
-        r, c = t.coords_of_index(i)
-        #print (r,c)
-        #print r
-        if r == len(shape) - 1: # must place in last row, or...
-            #print "in last row"
-            pass
-        else: # ...if not in last row, must be above a higher value
-            if len(rows[r+1]) - 1 < c:
-                #print "not in last row but is an overhang"
-                pass
-            elif t.coords(r+1, c) not in (0, None):
-                #print "not in last row but above hihger value"
-                pass
-            else:
-                #print "neither last row nor higher value nor overhang"
+        # p lists chosen then the rest, each in order, so its inversions
+        # are the pairs of a chosen index above one of the rest
+        sign = -1 if (sum(chosen) - offset) % 2 else 1
+        perm = list(chosen) + [i for i in range(len(positions)) if i not in chosen]
+        new_vals = list(vals)
+        for i, j in zip(positions, perm):
+            new_vals[i] = entries[j]
+        new_vals, column_sign = _sort_columns(table, new_vals, (c, c + 1))
+        yield new_vals, -sign * column_sign
+
+def _straighten(table, vals, modulus):
+    """
+    Standard basis coefficients of the polytabloid e_t, t given by
+    column-sorted vals (sorting the columns of t only changes the sign of
+    e_t). Pending terms are expanded in column order, so every term that
+    reaches a tableau has been added up (and cancelled, if it does) before
+    that tableau is expanded. Expansions are memoised on the shape's table
+    for the life of the process and returned without copying, so must not
+    be modified.
+    """
+    memo = table.straightened.setdefault(modulus, {})
+    if vals in memo:
+        return memo[vals]
+    expansion = {}
+    pending = {vals: 1}
+    heap = [(_column_order(table, vals), vals)]
+    while heap:
+        order, t = heappop(heap)
+        coeff = pending.pop(t)
+        if not coeff:
+            continue
+        descent = _row_descent(table, t)
+        if descent is None:
+            expansion[t] = coeff
+            continue
+        for new_vals, sign in _garnir(table, t, descent):
+            v = pending.get(new_vals)
+            if v is None:
+                heappush(heap, (_column_order(table, new_vals), new_vals))
+                v = 0
+            v += coeff * sign
+            pending[new_vals] = v % modulus if modulus else v
+    memo[vals] = expansion
+    return expansion
+
+def corner_rows(remaining):
+    """
+    Rows whose last cell is a removable corner of the shape remaining.
+    """
+    return [r for r, length in enumerate(remaining)
+            if length and (r + 1 == len(remaining) or remaining[r + 1] < length)]
+
+class StandardTableaux(object):
+    """
+    The standard tableaux of a shape, in total order or its reverse.
+    Tableaux are built by placing n, n-1, ..., 1 in turn at a corner of the
+    cells still left empty, trying corners from the top row down.
+    """
+    def __init__(self, shape, reverse=False):
+        self.shape = shape_table(shape).shape
+        self.reverse = reverse
+
+    def __len__(self):
+        return dimension(self.shape)
+
+    def _corners(self, remaining):
+        # ordered so that pop() gives the next corner to try.
+        rows = corner_rows(remaining)
+        return rows if self.reverse else rows[::-1]
+
+    def _position(self, forward_index):
+        return len(self) - 1 - forward_index if self.reverse else forward_index
+
+    def rank(self, t):
+        """
+        Index of the standard tableau t in this enumeration. At each step
+        the tableaux that place the current value at an earlier corner are
+        counted with the hook length formula rather than enumerated.
+        """
+        table = shape_table(self.shape)
+        positions = t.positions if isinstance(t, Tableaux) else Tableaux(self.shape, t).positions
+        remaining = list(self.shape)
+        index = 0
+        for k in range(table.size, 0, -1):
+            r = table.index_rows[positions[k]]
+            for corner in corner_rows(remaining):
+                if corner == r:
+                    break
+                remaining[corner] -= 1
+                index += dimension(remaining)
+                remaining[corner] += 1
+            remaining[r] -= 1
+        return self._position(index)
+
+    def unrank(self, index):
+        """
+        Inverse of rank: the standard tableau at the given index.
+        """
+        if not 0 <= index < len(self):
+            raise IndexError("no standard tableau with index {}".format(index))
+        table = shape_table(self.shape)
+        index = self._position(index)
+        remaining = list(self.shape)
+        vals = [0] * table.size
+        for k in range(table.size, 0, -1):
+            for corner in corner_rows(remaining):
+                remaining[corner] -= 1
+                count = dimension(remaining)
+                if index < count:
+                    vals[table.row_starts[corner] + remaining[corner]] = k
+                    break
+                index -= count
+                remaining[corner] += 1
+        return Tableaux(self.shape, vals)
+
+    def __iter__(self):
+        shape = self.shape
+        size = sum(shape)
+        starts = shape_table(shape).row_starts
+        remaining = list(shape) # number of empty cells left in each row
+        vals = [0] * size
+        placed = [] # row of each value placed so far, from n downwards
+        choices = [self._corners(remaining)]
+        while choices:
+            if not choices[-1]: # exhausted this level; undo the last placement
+                choices.pop()
+                if placed:
+                    r = placed.pop()
+                    vals[starts[r] + remaining[r]] = 0
+                    remaining[r] += 1
                 continue
-        if c == len(rows[r]) - 1: # must place in last column, or...
-            #print "in last col"
-            pass
-        else: # ...if not in last column, must be left of a higher value
-            if t.coords(r, c+1) != 0:
-                #print "not in last col but left of higher val"
-                pass
+            r = choices[-1].pop()
+            remaining[r] -= 1
+            vals[starts[r] + remaining[r]] = size - len(placed)
+            placed.append(r)
+            if len(placed) == size:
+                yield Tableaux(shape, vals)
+                placed.pop()
+                remaining[r] += 1
             else:
-                #print "neither last col nor higher val"
+                choices.append(self._corners(remaining))
+
+def total_order(shape, reverse=False):
+    # generates all standard tableaux, in order.
+    return iter(StandardTableaux(shape, reverse=reverse))
+
+def value_dtype(size):
+    return np.uint8 if size < 2 ** 8 else np.uint16
+
+def standard_vals(shape, reverse=False):
+    """
+    vals of every standard tableau of shape as a 2D array in total order,
+    memory-mapped from the on-disk cache (see cache.py) where possible.
+    """
+    standards = StandardTableaux(shape)
+    size = sum(standards.shape)
+    vals = cache.load("standards", standards.shape)
+    if vals is None or vals.shape != (len(standards), size):
+        vals = np.empty((len(standards), size), dtype=value_dtype(size))
+        for i, t in enumerate(standards):
+            vals[i] = t.vals
+        vals = cache.store("standards", standards.shape, vals)
+    return vals[::-1] if reverse else vals
+
+def corner_vals(shape, memo):
+    """
+    Same array as standard_vals(shape), built from the standard tableaux of
+    the shapes with one corner removed: those with n at the k-th corner
+    from the top come k-th in total order, and are the tableaux of the
+    shape without that corner with n inserted in the corner's cell. The
+    arrays of every shape built on the way are kept in memo.
+    """
+    if shape in memo:
+        return memo[shape]
+    size = sum(shape)
+    if size == 1:
+        vals = np.ones((1, 1), dtype=value_dtype(size))
+    else:
+        starts = shape_table(shape).row_starts
+        blocks = []
+        for r in corner_rows(shape):
+            smaller = tuple(length - (row == r) for row, length in enumerate(shape) if length - (row == r))
+            sub = corner_vals(smaller, memo).astype(value_dtype(size))
+            blocks.append(np.insert(sub, starts[r] + shape[r] - 1, size, axis=1))
+        vals = np.concatenate(blocks)
+    memo[shape] = vals
+    return vals
+
+class TableauxArray(object):
+    """
+    Tableaux of a single shape stored as a 2D array, one row of vals per
+    tableau, so that one tableau can be tested against all of them at once.
+    """
+    def __init__(self, shape, vals):
+        self.table = shape_table(shape)
+        self.shape = self.table.shape
+        self.vals = np.asarray(vals).reshape(-1, self.table.size)
+        # value_rows[i, k - 1] is the row containing k in the i-th tableau
+        index_rows = np.array(self.table.index_rows, dtype=np.uint8)
+        self.value_rows = index_rows[np.argsort(self.vals, axis=1)]
+
+    @classmethod
+    def from_shape(cls, shape, reverse=False):
+        return cls(shape, standard_vals(shape, reverse=reverse))
+
+    def __len__(self):
+        return len(self.vals)
+
+    def __getitem__(self, i):
+        return Tableaux(self.shape, self.vals[i].tolist())
+
+    def generates(self, t, start=0, stop=None, packed=False):
+        """
+        Vectorised Tableaux.generates: entry j of the result says whether
+        t generates self[start + j]. With packed=True the mask is returned
+        as GF(2) words (see gf2.pack_rows).
+        """
+        if stop is None:
+            stop = len(self)
+        mask = self._generates(t, self.value_rows[start:stop], range(start, stop))
+        if packed:
+            return pack_rows(mask)[0]
+        return mask
+
+    def generates_at(self, t, indices):
+        """
+        Whether t generates self[i], for each i in an array of indices.
+        """
+        return self._generates(t, self.value_rows[indices], indices)
+
+    def _generates(self, t, value_rows, indices):
+        # t generates s exactly when, for every column of t, the rows of s
+        # holding that column's values are 0, 1, ..., len(column) - 1 in
+        # some order. Summing 2 ** row over the column tests this in one pass.
+        if len(self.shape) >= 63:
+            return np.array([t.generates(self[i]) for i in indices], dtype=bool)
+        if len(value_rows) == 0:
+            return np.zeros(0, dtype=bool)
+        columns = list(t.columns())
+        order = np.array([k - 1 for col in columns for k in col])
+        offsets = np.cumsum([0] + [len(col) for col in columns[:-1]])
+        full = np.array([(1 << len(col)) - 1 for col in columns], dtype=np.int64)
+        bits = np.left_shift(np.int64(1), value_rows[:, order].astype(np.int64))
+        return (np.add.reduceat(bits, offsets, axis=1) == full).all(axis=1)
+
+    def candidate_index(self):
+        if not hasattr(self, "_candidate_index"):
+            self._candidate_index = CandidateIndex(self)
+        return self._candidate_index
+
+class CandidateIndex(object):
+    """
+    Prefilter for TableauxArray.generates. t can only generate s if each
+    value of t lies, in s, in one of the first L rows, where L is the length
+    of the value's column in t. For every value k and column length L the
+    index keeps the tableaux with k in the first L rows as a packed bitset,
+    so that ANDing the bitsets of t's values leaves a superset of the
+    tableaux t generates, usually a small one, at a cost of one bit per
+    tableau per value.
+    """
+    def __init__(self, standards):
+        self.size = len(standards)
+        self.nrows = len(standards.shape)
+        self.bits = {}
+        lengths = set(Partition(*standards.shape).conjugate().vals)
+        for L in lengths:
+            if L == self.nrows:
+                continue # every value is in the first nrows rows
+            words = pack_rows((standards.value_rows < L).T)
+            for k in range(standards.table.size):
+                self.bits[k + 1, L] = words[k]
+
+    def candidates(self, t, start=0, stop=None):
+        """
+        Sorted indices in [start, stop) of the tableaux t might generate.
+        """
+        if stop is None:
+            stop = self.size
+        first, last = start // 64, num_words(stop)
+        words = None
+        for col in t.columns():
+            if len(col) == self.nrows:
                 continue
-        next_vals = [val for val in t.vals]
-        next_vals[i] = adding
-        #print next_vals
-        if adding == 1: # base case
-            #print "base case"
-            yield Tableaux(shape, vals=next_vals)
-        else: # recursive case
-            #print "recursive case"
-            for child in total_order(shape, t=Tableaux(shape, vals=next_vals), adding=adding-1):
-                yield child
+            for k in col:
+                bits = self.bits[k, len(col)][first:last]
+                words = bits.copy() if words is None else np.bitwise_and(words, bits, out=words)
+        if words is None:
+            return np.arange(start, stop)
+        hits = np.flatnonzero(words)
+        if len(hits) == 0:
+            return hits
+        indices = ((hits + first) * 64)[:, np.newaxis] + np.arange(64)
+        indices = indices[unpack_rows(words[hits][:, np.newaxis], 64)]
+        return indices[(indices >= start) & (indices < stop)]
+
+# Standards per shape for the concurrent backends, so that workers only
+# build them once per shape. Workers interleave the blocks of the few shapes
+# kept in flight (see tasks.Pipeline), so only the most recent are kept.
+_standards_arrays = LRUCache(maxsize=4)
+
+def standards_array(shape):
+    """
+    TableauxArray of the standard tableaux of shape in reverse total order.
+    """
+    shape = shape_table(shape).shape
+    standards = _standards_arrays.get(shape)
+    if standards is None:
+        standards = TableauxArray.from_shape(shape, reverse=True)
+        _standards_arrays.put(shape, standards)
+    return standards
+
+def polytabloid_rows(standards, start, stop):
+    """
+    Packed GF(2) rows for the tableaux standards[start:stop] of a
+    TableauxArray: row i has bit j set for each j >= i such that
+    standards[i] generates standards[j]. Transposed, these rows are the
+    columns of the concurrent solvers' matrix. Returns the rows and the
+    number of pairs of distinct tableaux actually tested.
+    """
+    words = np.zeros((stop - start, num_words(len(standards))), dtype=np.uint64)
+    index = standards.candidate_index()
+    tests = 0
+    for i in range(start, stop):
+        t = standards[i]
+        candidates = index.candidates(t, start=i)
+        tests += int(np.count_nonzero(candidates > i))
+        hits = candidates[standards.generates_at(t, candidates)]
+        np.bitwise_or.at(words[i - start], hits >> 6, np.left_shift(np.uint64(1), (hits & 63).astype(np.uint64)))
+    return words, tests
 
 def find_solution(shape, verbose=False, skip_known_families=True, return_matrix=False):
     if type(shape) is Partition:
         shape = shape.vals
     if skip_known_families:
-        p = Partition(*shape)
-        if p.is_one_dimensional():
-            if verbose:
-                print "Skipping 1D partition"
-            return 1
-        elif p.is_self_conjugate():
-            if verbose:
-                print "Skipping self-conjugate partition"
-            return 0
-        elif p.is_hook():
+        known = known_solution(Partition(*shape))
+        if known is not None:
+            family, solution = known
             if verbose:
-                print "Skipping hook partition"
-            i = sum(p.vals)
-            r = p.vals[1:].count(1)
-            choose = factorial(i - 1) / (factorial(r) * factorial(i - 1 - r))
-            if (i % 2, r % 2, choose % 2) == (1, 0, 1):
-                return 1
-            else:
-                return 0
+                print "Skipping {} partition".format(family)
+            return solution
     if shape == (1,):
         # isolate this case to avoid numpy exception when building matrix
         return 1
     if verbose:
         print "Generating all standard {}-tableaux...\n".format(shape)
     polys = []
+    order = StandardTableaux(shape, reverse=True)
+    profile.set("dimension", len(order))
     if verbose:
         print "-" * 20
-    for t in [t for t in total_order(shape)][::-1]:
-        standards = [t]
-        #if verbose:
-        #    print "Next tableaux:\n{}\n".format(t)
-        poly = set([tab for tab in t.polytabloid() if tab != t])
-        if len(poly) > 1:
-            for s in poly:
-                if s.vals != t.vals:
-                    print "{} --> {}".format(t.vals, s.vals)
-                    standards.append(s)
-        polys.append(standards)
-    columns = []
+    with profile.phase("enumerate"):
+        all_vals = standard_vals(shape, reverse=True)
+    # each tableau is tested against its images under every column
+    # permutation fixing 1 (see Tableaux.polytabloid) but the identity
+    columns = Partition(*shape).conjugate().vals
+    tests = factorial(columns[0] - 1)
+    for c in columns[1:]:
+        tests *= factorial(c)
+    tests -= 1
+    with profile.phase("pairs"):
+        for vals in all_vals:
+            t = Tableaux(shape, vals.tolist())
+            standards = [t]
+            #if verbose:
+            #    print "Next tableaux:\n{}\n".format(t)
+            poly = set([tab for tab in t.polytabloid() if tab != t])
+            profile.count("pair_tests", tests)
+            if len(poly) > 1:
+                for s in poly:
+                    if s.vals != t.vals:
+                        print "{} --> {}".format(t.vals, s.vals)
+                        standards.append(s)
+            polys.append(standards)
     if verbose:
         print "Creating matrix from polytabloids."
-    for i, poly in enumerate(polys):
-        vec = [0] * len(polys)
-        vec[i] = 1
-        if len(poly) > 1:
-            for s in poly:
-                #find the index of the standard tableaux
-                x = [l[0] for l in polys].index(s)
-                vec[x] = 1
-        columns.append(vec)
-    matrix = column_stack(columns)
+    with profile.phase("assemble"):
+        # unitriangular in this order, so stored sparse and solved by substitution
+        columns = []
+        for i, poly in enumerate(polys):
+            column = [i]
+            if len(poly) > 1:
+                column += [order.rank(s) for s in poly]
+            columns.append(column)
+        matrix = SparseGF2Matrix.from_columns(len(polys), columns)
     if return_matrix:
         print matrix
         return matrix
     if verbose:
         print matrix
-    solution = map(int, linalg.solve(matrix, [1] * len(polys)))
+    with profile.phase("solve"):
+        solution = matrix.solve([1] * len(polys))
     if verbose:
-        print "Solution vector: {}".format(solution)
-        print "Sum of standard coefficients is congruent to {} (mod 2).".format(sum(solution) % 2)
-    return sum(solution)
+        print "Solution vector: {}".format(solution.tolist())
+        print "Sum of standard coefficients is congruent to {} (mod 2).".format(solution.sum() % 2)
+    return int(solution.sum() % 2)
 
-def find_solution_new(shape, verbosity=0):
+def find_solution_new(shape, verbosity=0, checkpoint=True):
+    """
+    With checkpoint, progress is saved periodically (see checkpoint.py)
+    and a solve of the same shape that was interrupted is resumed.
+    """
     if type(shape) == Partition:
         shape = shape.vals
-    standards = [s for s in total_order(shape)][::-1]
-    vector = [0] * len(standards)
+    with profile.phase("enumerate"):
+        standards = TableauxArray.from_shape(shape, reverse=True)
+    return _solve_standards(standards, verbosity, checkpoint)
+
+def find_solutions(shapes, verbosity=0, checkpoint=True, memo=None):
+    """
+    find_solution_new for each of a list of shapes, returning the list of
+    solutions. The standard tableaux of all the shapes are built in one
+    pass (see corner_vals), sharing every sub-shape they have in common;
+    pass the same memo dict to several calls to share it between them.
+    """
+    if memo is None:
+        memo = {}
+    solutions = []
+    for shape in shapes:
+        if type(shape) == Partition:
+            shape = shape.vals
+        with profile.phase("enumerate"):
+            shape = shape_table(shape).shape
+            standards = TableauxArray(shape, corner_vals(shape, memo)[::-1])
+        solutions.append(_solve_standards(standards, verbosity, checkpoint))
+    return solutions
+
+def _solve_standards(standards, verbosity, checkpoint):
+    f = len(standards)
+    profile.set("dimension", f)
+    checkpoint = Checkpoint("solve", standards.shape, enabled=checkpoint)
+    vector = np.zeros(f, dtype=bool)
     solution = 0
-    for i,t in enumerate(standards):
-        if verbosity > 1:
-            print "Next tableau:\n{}".format(t)
-        if vector[i] == 1:
+    start = 0
+    saved = checkpoint.load()
+    if saved is not None and saved["dimension"] == f:
+        start, solution = int(saved["index"]), int(saved["solution"])
+        vector[:] = np.unpackbits(saved["vector"])[:f].astype(bool)
+        if verbosity > 0:
+            print "Resuming {} from tableau {} of {}.".format(standards.shape, start, f)
+    with profile.phase("enumerate"):
+        index = standards.candidate_index()
+    with profile.phase("pairs"):
+        for i in range(start, f):
+            if checkpoint.due():
+                checkpoint.save(dimension=f, index=i, solution=solution, vector=np.packbits(vector))
+            t = standards[i]
             if verbosity > 1:
-                print "Skipping polytabloid computation."
-            continue
-        for j,t2 in enumerate(standards[:i]):
-            if t == t2:
-                vector[i] = (vector[i] + 1) % 2
-            elif t.generates(t2):
-                vector[j] = (vector[j] + 1) % 2
-        solution = (solution + 1) % 2
+                print "Next tableau:\n{}".format(t)
+            if vector[i]:
+                if verbosity > 1:
+                    print "Skipping polytabloid computation."
+                continue
+            candidates = index.candidates(t, stop=i)
+            vector[candidates[standards.generates_at(t, candidates)]] ^= True
+            profile.count("pair_tests", len(candidates))
+            solution = (solution + 1) % 2
+    checkpoint.clear()
     return solution
 
+def stream_blocks(shape, block_size, stop=None):
+    """
+    Yields (start, TableauxArray) for consecutive blocks of the standard
+    tableaux of shape in reverse total order, up to index stop, without
+    ever holding more than one block.
+    """
+    shape = shape_table(shape).shape
+    size = sum(shape)
+    tableaux = iter(StandardTableaux(shape, reverse=True))
+    start = 0
+    while stop is None or start < stop:
+        count = block_size if stop is None else min(block_size, stop - start)
+        vals = [t.vals for t in islice(tableaux, count)]
+        if not vals:
+            return
+        yield start, TableauxArray(shape, np.array(vals, dtype=value_dtype(size)))
+        start += len(vals)
+
+class StreamedStandards(object):
+    """
+    Block source for find_solution_blocks which enumerates the standard
+    tableaux afresh for every pass, so nothing but the current block is
+    ever held or stored.
+    """
+    def __init__(self, shape, block_size=4096):
+        self.shape = shape_table(shape).shape
+        self.block_size = block_size
+        self.size = dimension(self.shape)
+        self.num_blocks = (self.size + block_size - 1) // block_size
+
+    def blocks(self, first=0, last=None):
+        """
+        (index of its first tableau, TableauxArray) for blocks first..last-1.
+        """
+        stop = None if last is None else last * self.block_size
+        return islice(stream_blocks(self.shape, self.block_size, stop=stop), first, None)
+
+    def close(self):
+        pass
+
+class TiledStandards(object):
+    """
+    Block source for find_solution_blocks which reads the standard tableaux
+    from the on-disk standards array, memory-mapped, one block at a time.
+    The array is the one cached by standard_vals (see cache.py), written by
+    streaming the enumeration if it is not there yet, or a temporary file,
+    removed by close(), if the cache is disabled.
+    """
+    def __init__(self, shape, block_size=65536):
+        self.shape = shape_table(shape).shape
+        self.block_size = block_size
+        self.size = dimension(self.shape)
+        self.num_blocks = (self.size + block_size - 1) // block_size
+        self.temporary = not cache.cache_dir()
+        if self.temporary:
+            self.directory = tempfile.mkdtemp(prefix="tiles-")
+            self.path = os.path.join(self.directory, "standards.npy")
+        else:
+            self.path = cache.cache_path("standards", self.shape)
+        vals = self._load()
+        if vals is None:
+            # renamed into place once written, so a file left by an
+            # interrupted run is always complete
+            cache.write_atomic(self.path, self._write)
+            vals = self._load()
+        self.vals = vals[::-1]
+
+    def _load(self):
+        try:
+            vals = np.load(self.path, mmap_mode="r")
+        except (IOError, ValueError):
+            return None
+        if vals.shape != (self.size, sum(self.shape)):
+            return None
+        return vals
+
+    def _write(self, f):
+        # the same .npy file as standard_vals stores, in total order, written
+        # a block at a time
+        size = sum(self.shape)
+        dtype = np.dtype(value_dtype(size))
+        np.lib.format.write_array_header_1_0(f, {"descr": np.lib.format.dtype_to_descr(dtype),
+                                                  "fortran_order": False, "shape": (self.size, size)})
+        tableaux = iter(StandardTableaux(self.shape))
+        while True:
+            vals = [t.vals for t in islice(tableaux, self.block_size)]
+            if not vals:
+                return
+            f.write(np.array(vals, dtype=dtype).tobytes())
+
+    def block(self, b):
+        """
+        (index of its first tableau, TableauxArray) for block b.
+        """
+        start = b * self.block_size
+        return start, TableauxArray(self.shape, np.array(self.vals[start:start + self.block_size]))
+
+    def blocks(self, first=0, last=None):
+        for b in range(first, self.num_blocks if last is None else last):
+            yield self.block(b)
+
+    def close(self):
+        if self.temporary:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+def find_solution_blocks(standards, verbosity=0, checkpoint=True):
+    """
+    Same result as find_solution_new, out of core. standards is a block
+    source (StreamedStandards or TiledStandards) and the pairs are
+    evaluated a tile (block b against block a <= b) at a time, in
+    triangular order, so at most two blocks are ever in memory, besides one
+    bit per tableau for the pending flips. With checkpoint, progress is
+    saved between blocks. The source is closed once the solve is over.
+    """
+    block_size = standards.block_size
+    f = standards.size
+    profile.set("dimension", f)
+    checkpoint = Checkpoint("blocks", standards.shape, enabled=checkpoint)
+    vector = np.zeros((f + 7) // 8, dtype=np.uint8) # np.packbits order
+    solution = 0
+    first = 0
+    saved = checkpoint.load()
+    if saved is not None and saved["dimension"] == f and saved["block_size"] == block_size:
+        first, solution = int(saved["block"]), int(saved["solution"])
+        vector[:] = saved["vector"]
+        if verbosity > 0:
+            print "Resuming {} from block {} of {}.".format(standards.shape, first, standards.num_blocks)
+    try:
+        with profile.phase("pairs"):
+            for b, (start, block) in enumerate(standards.blocks(first), first):
+                if checkpoint.due():
+                    checkpoint.save(dimension=f, block_size=block_size, block=b, solution=solution, vector=vector)
+                span = slice(start // 8, (start + len(block) + 7) // 8)
+                pending = np.unpackbits(vector[span])[:len(block)].astype(bool)
+                index = block.candidate_index()
+                active = []
+                # the diagonal tile: the block against itself
+                for i in range(len(block)):
+                    if pending[i]:
+                        continue
+                    t = block[i]
+                    if verbosity > 1:
+                        print "Next tableau:\n{}".format(t)
+                    candidates = index.candidates(t, stop=i)
+                    pending[candidates[block.generates_at(t, candidates)]] ^= True
+                    profile.count("pair_tests", len(candidates))
+                    active.append(t)
+                    solution = (solution + 1) % 2
+                vector[span] = np.packbits(pending)
+                if verbosity > 0:
+                    print "Block {} of {}: {} active tableaux.".format(b + 1, standards.num_blocks, len(active))
+                if not active:
+                    continue
+                # the tiles below it: the block's active tableaux against each earlier block
+                for earlier_start, earlier in standards.blocks(last=b):
+                    earlier_index = earlier.candidate_index()
+                    mask = np.zeros(len(earlier), dtype=bool)
+                    for t in active:
+                        candidates = earlier_index.candidates(t)
+                        mask[candidates[earlier.generates_at(t, candidates)]] ^= True
+                        profile.count("pair_tests", len(candidates))
+                    vector[earlier_start // 8:earlier_start // 8 + (len(earlier) + 7) // 8] ^= np.packbits(mask)
+    finally:
+        standards.close()
+    checkpoint.clear()
+    return solution
+
+def find_solution_stream(shape, block_size=4096, verbosity=0, checkpoint=True):
+    """
+    find_solution_blocks over blocks streamed from a fresh enumeration for
+    each pass: nothing is stored, at the cost of re-enumerating the earlier
+    tableaux for every block.
+    """
+    if type(shape) == Partition:
+        shape = shape.vals
+    block_size = max(8, block_size - block_size % 8) # keep blocks byte-aligned in vector
+    return find_solution_blocks(StreamedStandards(shape, block_size), verbosity, checkpoint)
+
+def find_solution_tiled(shape, block_size=65536, verbosity=0, checkpoint=True):
+    """
+    find_solution_blocks over blocks read from the standards array on disk
+    (see TiledStandards), which is written once and shared with the other
+    solvers.
+    """
+    if type(shape) == Partition:
+        shape = shape.vals
+    block_size = max(8, block_size - block_size % 8) # keep blocks byte-aligned in vector
+    with profile.phase("enumerate"):
+        standards = TiledStandards(shape, block_size)
+    return find_solution_blocks(standards, verbosity, checkpoint)
+
+def automation_backend(block_size=65536, **options):
+    """
+    Backend "tiled": partitions are solved one at a time by
+    find_solution_tiled (see backends.py).
+    """
+    return {"solver": lambda p: find_solution_tiled(p, block_size=block_size)}
+
 if __name__ == "__main__":
     parser = ArgumentParser()
     parser.add_argument("partition", nargs="*")
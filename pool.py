@@ -0,0 +1,102 @@
+"""
+Local process pool backend for the concurrent solver, for running on a
+single machine without Redis or Celery. Computes the same matrix as
+tasks.find_solution_concurrent, split into chunks of rows across cores.
+"""
+from multiprocessing import Pool, TimeoutError, cpu_count
+import signal
+from polytabloid import polytabloid_rows, standards_array
+from partition import Partition
+from gf2 import SparseGF2Matrix, sparse_rows
+from checkpoint import Checkpoint, load_columns, save_columns
+from instrument import profile
+
+# How often a parent waiting on a pool wakes up. Python 2 cannot deliver
+# KeyboardInterrupt to a thread blocked in a wait without a timeout.
+POLL_INTERVAL = 0.5
+
+def _ignore_sigint():
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def worker_pool(processes=None):
+    """
+    Pool whose workers ignore Ctrl-C, which is left to the parent: it
+    stops waiting (see imap_unordered) and terminates the pool, instead
+    of the pool quietly replacing workers killed by KeyboardInterrupt.
+    """
+    return Pool(processes or cpu_count(), _ignore_sigint)
+
+def imap_unordered(pool, func, iterable):
+    """
+    pool.imap_unordered, waiting for each result with a timeout so that
+    KeyboardInterrupt reaches the caller.
+    """
+    results = pool.imap_unordered(func, iterable)
+    while True:
+        try:
+            yield results.next(timeout=POLL_INTERVAL)
+        except TimeoutError:
+            continue
+        except StopIteration:
+            return
+
+def _rows_task(args):
+    shape, start, stop = args
+    words, tests = polytabloid_rows(standards_array(shape), start, stop)
+    return start, words, tests
+
+def find_solution_pool(shape, processes=None, chunk_size=None, verbosity=0, return_matrix=False, checkpoint=True):
+    if type(shape) == Partition:
+        shape = shape.vals
+    shape = tuple(shape)
+    # built before the pool forks, so that workers share the parent's pages
+    # (and the memory-mapped cache file, if there is one).
+    with profile.phase("enumerate"):
+        f = len(standards_array(shape))
+        standards_array(shape).candidate_index()
+    profile.set("dimension", f)
+    processes = processes or cpu_count()
+    if not chunk_size:
+        chunk_size = max(1, f // (4 * processes))
+    # columns finished by an interrupted solve (by this or the celery
+    # backend, which build the same matrix) are not recomputed.
+    checkpoint = Checkpoint("columns", shape, enabled=checkpoint)
+    columns = load_columns(checkpoint, f)
+    chunks = [(shape, i, min(f, i + chunk_size)) for i in range(0, f, chunk_size)
+              if any(c is None for c in columns[i:i + chunk_size])]
+    if verbosity > 0:
+        print "{}: {} standard tableaux in {} chunks over {} processes".format(shape, f, len(chunks), processes)
+    pool = worker_pool(processes)
+    try:
+        # pair tests happen in the workers; this phase is the wall time until
+        # the last chunk arrives, including storing each chunk.
+        with profile.phase("pairs"):
+            for start, words, tests in imap_unordered(pool, _rows_task, chunks):
+                profile.count("pair_tests", tests)
+                # row i of the worker's block is column i of the matrix
+                columns[start:start + len(words)] = sparse_rows(words, f)
+                if checkpoint.due():
+                    save_columns(checkpoint, columns)
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+    checkpoint.clear()
+    with profile.phase("assemble"):
+        matrix = SparseGF2Matrix.from_columns(f, columns)
+    if return_matrix:
+        return matrix
+    with profile.phase("solve"):
+        solution = matrix.solve([1] * f)
+    if verbosity > 0:
+        print solution.tolist()
+    return int(solution.sum() % 2)
+
+def automation_backend(processes=None, verbosity=0, **options):
+    """
+    Backend "pool": partitions are solved one at a time, each split across
+    the processes of a local pool (see backends.py).
+    """
+    return {"solver": lambda p: find_solution_pool(p, processes=processes, verbosity=verbosity)}
@@ -0,0 +1,75 @@
+"""
+Cost model and ordering for automation jobs.
+
+The time to solve a partition p of n with dimension f is modelled as
+
+    c0 + c1 * f * n + c2 * f ** 2 * n + c3 * f ** 2 * columns(p)
+
+(a fixed overhead, per-tableau work, the candidate bitsets and the exact
+generates tests respectively). The coefficients start from values measured
+on find_solution_new and are refitted from the specht_metrics table once it
+holds enough solves. Automation solves the cheaper side of each conjugate
+pair and hands out the most expensive jobs first, so that the last job of
+each n to finish is a short one.
+"""
+import numpy as np
+from partition import Partition
+
+DEFAULT_COEFFICIENTS = (4e-4, 5e-6, 8e-10, 3e-11)
+
+# Fewer measured solves than this and the defaults are kept. Solves
+# quicker than MIN_SECONDS are mostly noise and are left out.
+MIN_SAMPLES = 8
+MIN_SECONDS = 0.01
+
+def features(p):
+    f = float(p.dimension())
+    n = sum(p.vals)
+    return (1.0, f * n, f * f * n, f * f * len(p.conjugate().vals))
+
+class CostModel(object):
+    def __init__(self, coefficients=DEFAULT_COEFFICIENTS):
+        self.coefficients = np.array(coefficients, dtype=float)
+
+    @classmethod
+    def fit(cls, samples):
+        """
+        Least-squares model from (Partition, seconds) pairs, minimising the
+        relative error so that the many small solves do not swamp the few
+        large ones. Coefficients which come out negative are dropped to zero.
+        """
+        samples = [(p, seconds) for p, seconds in samples if seconds >= MIN_SECONDS]
+        if len(samples) < MIN_SAMPLES:
+            return cls()
+        y = np.array([seconds for p, seconds in samples])
+        x = np.array([features(p) for p, seconds in samples]) / y[:, np.newaxis]
+        scale = np.abs(x).max(axis=0) # the features span many orders of magnitude
+        coefficients = (np.linalg.lstsq(x / scale, np.ones(len(y)), rcond=None)[0] / scale).clip(min=0)
+        if not coefficients.any():
+            return cls()
+        return cls(coefficients)
+
+    @classmethod
+    def from_metrics(cls, cur):
+        rows = cur.execute("SELECT partition, wall_seconds FROM specht_metrics WHERE wall_seconds IS NOT NULL")
+        return cls.fit([(Partition(p_str), seconds) for p_str, seconds in rows])
+
+    def predict(self, p):
+        return float(np.dot(self.coefficients, features(p)))
+
+    def choose(self, p, p2):
+        """
+        (partition to solve, its conjugate, predicted seconds) for the
+        cheaper side of a conjugate pair, preferring p on a tie.
+        """
+        cost, cost2 = self.predict(p), self.predict(p2)
+        if cost2 < cost:
+            return p2, p, cost2
+        return p, p2, cost
+
+def schedule(pairs, model):
+    """
+    (partition, conjugate, predicted seconds) for each pair, on the cheaper
+    side, most expensive first.
+    """
+    return sorted((model.choose(p, p2) for p, p2 in pairs), key=lambda job: -job[2])
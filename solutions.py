@@ -0,0 +1,94 @@
+"""
+Read-through cache of solutions: an in-process LRU in front of the specht
+table, in front of the solver. A partition and its conjugate have the same
+solution, so shapes are looked up as conjugate pairs, and partitions in a
+family with a known solution are answered without the database or the
+solver. Solutions the solver has to find are written back to the table.
+"""
+import os
+from lru import LRUCache
+from partition import Partition, known_solution
+import db
+
+def pair_key(p):
+    # the same for a partition and its conjugate
+    return max(p.vals, p.conjugate().vals)
+
+def _find_solution(shape):
+    from polytabloid import find_solution_new # numpy is only needed on a miss
+    return find_solution_new(shape)
+
+class SolutionCache(object):
+    def __init__(self, conn=None, solver=None, maxsize=4096):
+        self.conn = conn
+        self.solver = solver or _find_solution
+        self.lru = LRUCache(maxsize)
+        self.stats = dict.fromkeys(("lru", "family", "db", "solver"), 0)
+
+    def lookup(self, shape):
+        """
+        Solution of shape if it is cached, in a known family or stored,
+        else None. Never runs the solver.
+        """
+        p = shape if isinstance(shape, Partition) else Partition(*shape)
+        key = pair_key(p)
+        solution = self.lru.get(key)
+        if solution is not None:
+            self.stats["lru"] += 1
+            return solution
+        known = known_solution(p)
+        if known is not None:
+            solution = known[1]
+            self.stats["family"] += 1
+        elif self.conn is not None:
+            solution = db.lookup_solution(self.conn.cursor(), p)
+            if solution is not None:
+                self.stats["db"] += 1
+        if solution is not None:
+            self.lru.put(key, solution)
+        return solution
+
+    def get(self, shape, solver=None):
+        """
+        Solution of shape, running the solver (or the one given) and storing
+        the result for shape and its conjugate, only if lookup finds nothing.
+        """
+        p = shape if isinstance(shape, Partition) else Partition(*shape)
+        solution = self.lookup(p)
+        if solution is None:
+            solution = (solver or self.solver)(p.vals) % 2
+            self.stats["solver"] += 1
+            self.lru.put(pair_key(p), solution)
+            if self.conn is not None:
+                n = sum(p.vals)
+                db.insert_solutions(self.conn.cursor(), [(n, p, solution), (n, p.conjugate(), solution)])
+                self.conn.commit()
+        return solution
+
+# One SolutionCache per database file (None for none) and process, each
+# with its own connection, so that callers' connections are never kept.
+_caches = {}
+
+def database_path(conn):
+    """
+    File behind conn, or None for an in-memory database.
+    """
+    path = conn.execute("PRAGMA database_list").fetchone()[2]
+    return os.path.realpath(path) if path else None
+
+def solution_cache(conn=None):
+    """
+    The process-wide SolutionCache for the database conn is connected to.
+    """
+    path = None if conn is None else database_path(conn)
+    key = (path, os.getpid()) # connections do not survive a fork
+    if key not in _caches:
+        _caches[key] = SolutionCache(db.connect(path) if path else None)
+    return _caches[key]
+
+def cached_solution(shape, conn=None, solver=None):
+    """
+    Solution of shape through solution_cache(conn), running solver
+    (find_solution_new by default) only if it is not known.
+    """
+    return solution_cache(conn).get(shape, solver)
@@ -1,50 +1,200 @@
-from celery import Celery, group 
+from celery import Celery, group
+from celery.result import ResultSet
 from celery.utils.log import get_task_logger
-from polytabloid import Tableaux, total_order
-from partition import Partition
+from polytabloid import polytabloid_rows, standards_array
+from partition import Partition, dimension
+from gf2 import SparseGF2Matrix, num_words, sparse_rows
+from checkpoint import Checkpoint, load_columns, save_columns
+from base64 import b64decode, b64encode
+from instrument import Profile, profile
+from collections import deque
 import numpy as np
+import time
 
 app = Celery("tasks", broker="redis://localhost", backend="redis://localhost")
 log = get_task_logger(__name__)
 
-@app.task(name="tasks.polytabloid_vector")
-def polytabloid_vector(shape, t, standards, t_index, verbosity=0):
-    vec = [0] * len(standards)
-    t = Tableaux(shape, vals=t)
-    log.critical("{}: {}".format(shape, t.vals))
-    for i,s in enumerate(standards[t_index:]):
-        s = Tableaux(shape, vals=s)
-        if t.generates(s):
-            log.debug("{} --> {}".format(t.vals, s.vals)) 
-            vec[i + t_index] = 1
-        else:
-            if verbosity > 2:
-                log.debug("{} -/> {}".format(t.vals, s.vals)) 
-    return vec
-
-@app.task(name="tasks.sort_cols")
-def sort_cols(columns):
-    # sorted because celery has a bug with redis and group orderings...
-    return sorted(columns, key=(lambda l: l.index(1)))
-
-@app.task(name="tasks.solve_system")
-def solve_system(columns):
-    matrix = np.column_stack(columns)
-    return map(int, np.linalg.solve(matrix, [1] * len(columns)))
-
-def find_solution_concurrent(shape, verbosity=0, return_matrix=False):
-    if type(shape) == Partition:
-        shape = shape.vals
+@app.task(name="tasks.polytabloid_block")
+def polytabloid_block(shape, start, stop, verbosity=0):
+    """
+    Computes rows start..stop-1 of the generates matrix for shape. The
+    standard tableaux are rebuilt (or memory-mapped from the cache) on the
+    worker, so only the shape and row range travel over the broker. Rows
+    come back as base64-encoded GF(2) words, tagged with their range and
+    followed by the number of pair tests.
+    """
     if verbosity > 0:
-        print shape
-    standards = [s.vals for s in total_order(shape)][::-1]
-    tasks = group(polytabloid_vector.s(shape, t, standards, i, verbosity=verbosity) for i,t in enumerate(standards))
+        log.info("{}: rows {} to {}".format(shape, start, stop))
+    words, tests = polytabloid_rows(standards_array(shape), start, stop)
+    return start, stop, b64encode(words.astype("<u8").tobytes()), tests
+
+def decode_rows(data, ncols):
+    return np.frombuffer(b64decode(data), dtype="<u8").astype(np.uint64).reshape(-1, num_words(ncols))
+
+class _ResultSet(ResultSet):
+    # one MGET for the results stored before the wait began, without the
+    # half-second sleep get_many otherwise takes after it
+    def _iter_meta(self):
+        return (meta for task_id, meta in self.backend.get_many(
+            set(result.id for result in self.results), interval=0, max_iterations=1))
+
+def arrivals(results):
+    """
+    Yields each of results as it finishes. The redis result backend
+    pushes results as they are stored (see ResultSet.iter_native), so
+    waiting costs a single request to redis, however long it takes.
+    """
+    results = list(results)
+    if not results:
+        return
+    by_id = dict((result.id, result) for result in results)
+    for task_id, meta in _ResultSet(results).iter_native():
+        yield by_id[task_id]
+
+class ShapeSolve(object):
+    """
+    The blocks of one shape, submitted to the workers without waiting for
+    them. Blocks are collected (and checkpointed) as they arrive, so a solve
+    that is interrupted only resubmits the blocks it had not received.
+    Timings and counts go to the given profile.
+    """
+    def __init__(self, shape, verbosity=0, chunk_size=None, checkpoint=True, profile=profile):
+        if type(shape) == Partition:
+            shape = shape.vals
+        self.shape = tuple(shape)
+        self.verbosity = verbosity
+        self.profile = profile
+        self.f = f = dimension(self.shape)
+        if verbosity > 0:
+            print self.shape
+        profile.set("dimension", f)
+        if not chunk_size:
+            chunk_size = max(1, f // 64)
+        self.checkpoint = Checkpoint("columns", self.shape, enabled=checkpoint)
+        self.columns = load_columns(self.checkpoint, f)
+        blocks = [polytabloid_block.s(self.shape, i, min(f, i + chunk_size), verbosity=verbosity)
+                  for i in range(0, f, chunk_size) if any(c is None for c in self.columns[i:i + chunk_size])]
+        self.submitted = time.time()
+        self.finished = None
+        self.outstanding = list(group(blocks).apply_async().results) if blocks else []
+
+    def receive(self, result):
+        """
+        Store the block of a finished result.
+        """
+        start, stop, data, tests = result.get()
+        self.profile.count("pair_tests", tests)
+        # row i of a block is column i of the matrix
+        self.columns[start:stop] = sparse_rows(decode_rows(data, self.f), self.f)
+        if self.checkpoint.due():
+            save_columns(self.checkpoint, self.columns)
+        self.outstanding.remove(result)
+
+    def done(self):
+        """
+        Whether every block is in. The first time it is, the time on the
+        workers is recorded and the checkpoint dropped.
+        """
+        if self.outstanding:
+            return False
+        if self.finished is None:
+            self.finished = time.time()
+            # enumeration and pair tests both happen on the workers.
+            self.profile.seconds["pairs"] = self.finished - self.submitted
+            self.checkpoint.clear()
+        return True
+
+    def collect(self):
+        """
+        Wait for every block, storing each as it arrives.
+        """
+        for result in arrivals(self.outstanding):
+            self.receive(result)
+        return self.done()
+
+    def matrix(self):
+        with self.profile.phase("assemble"):
+            return SparseGF2Matrix.from_columns(self.f, self.columns)
+
+    def solve(self):
+        matrix = self.matrix()
+        with self.profile.phase("solve"):
+            solution = matrix.solve([1] * self.f)
+        if self.verbosity > 0:
+            print solution.tolist()
+        return int(solution.sum() % 2)
+
+def find_solution_concurrent(shape, verbosity=0, return_matrix=False, chunk_size=None, checkpoint=True):
+    job = ShapeSolve(shape, verbosity=verbosity, chunk_size=chunk_size, checkpoint=checkpoint)
+    job.collect()
     if return_matrix:
-        return np.column_stack((tasks | sort_cols.s())().get())
-    solution = (tasks | sort_cols.s() | solve_system.s())().get()
-    if verbosity > 0:
-        print solution
-    return sum(solution) % 2
+        return job.matrix()
+    return job.solve()
+
+class Pipeline(object):
+    """
+    Solves many shapes on the workers at once. Up to max_in_flight shapes
+    have their blocks queued at any time, and the next shape is submitted
+    as soon as one finishes, so the workers never drain while the last,
+    slowest blocks of a shape are still running.
+
+        pipeline = Pipeline()
+        for shape in shapes:
+            pipeline.submit(shape, tag=shape)
+        for tag, solution, metrics in pipeline.as_completed():
+            ...
+    """
+    def __init__(self, max_in_flight=4, **options):
+        self.max_in_flight = max_in_flight
+        self.options = options
+        self.waiting = deque()
+        self.running = []
+
+    def __len__(self):
+        return len(self.waiting) + len(self.running)
+
+    def submit(self, shape, tag=None):
+        """
+        Queue shape to be solved, without blocking.
+        """
+        self.waiting.append((tag, shape))
+        self._fill()
+
+    def _fill(self):
+        while self.waiting and len(self.running) < self.max_in_flight:
+            tag, shape = self.waiting.popleft()
+            self.running.append((tag, ShapeSolve(shape, profile=Profile(), **self.options)))
+
+    def as_completed(self, drain=True):
+        """
+        Yields (tag, solution, metrics) for each submitted shape as it
+        finishes. Without drain, returns as soon as every queued shape has
+        been submitted, so that more can be queued behind those in flight.
+        """
+        while self.running and (drain or self.waiting):
+            finished = [(tag, job) for tag, job in self.running if job.done()]
+            if not finished:
+                # wait for blocks of any shape in flight, until one is complete
+                owners = dict((result, job) for tag, job in self.running for result in job.outstanding)
+                for result in arrivals(owners):
+                    job = owners[result]
+                    job.receive(result)
+                    if job.done():
+                        break
+                finished = [(tag, job) for tag, job in self.running if job.done()]
+            for item in finished:
+                self.running.remove(item)
+            # keep the workers busy while the finished shapes are solved here
+            self._fill()
+            for tag, job in finished:
+                yield tag, job.solve(), job.profile.metrics()
+
+def automation_backend(in_flight=4, verbosity=0, **options):
+    """
+    Backend "celery": several partitions at a time are kept queued on the
+    celery workers through a Pipeline (see backends.py).
+    """
+    return {"pipeline": Pipeline(max_in_flight=in_flight, verbosity=verbosity)}
 
 if __name__ == "__main__":
     assert find_solution_concurrent((3,3,3)) == 0
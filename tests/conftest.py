@@ -0,0 +1,9 @@
+import pytest
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmpdir_factory, monkeypatch):
+    """
+    Keep the on-disk cache (and checkpoints) of every test out of the
+    user's real cache directory.
+    """
+    monkeypatch.setenv("POLYTABLOID_CACHE", str(tmpdir_factory.mktemp("cache")))
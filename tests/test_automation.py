@@ -0,0 +1,118 @@
+from ..automation import automate, pending_pairs, resume_from
+from ..polytabloid import find_solution_new
+from ..partition import Partition
+from .. import automation, db
+import os
+import signal
+import subprocess
+import sys
+import time
+
+def make_db(path):
+    return db.connect(path)
+
+def test_automate(tmpdir):
+    conn = make_db(str(tmpdir.join("data.db")))
+    automate(conn, 2, stop=9, jobs=2, batch_size=3)
+    rows = conn.execute("SELECT n, partition, solution FROM specht").fetchall()
+    assert len(rows) == len(set(p for n, p, sol in rows))
+    for n, p_str, sol in rows:
+        p = Partition(p_str)
+        assert sum(p.vals) == n
+        assert p.is_2special() and p.conjugate().is_2special()
+        assert sol == find_solution_new(p) % 2
+    for n in range(2, 10):
+        assert list(pending_pairs(conn.cursor(), n)) == []
+    # a resumed run has nothing left to do
+    automate(conn, 2, stop=9, solver=lambda p: 1/0)
+
+def test_resume(tmpdir):
+    # (7,3,3) and its conjugate are the only pair of 13 outside the known families
+    conn = make_db(str(tmpdir.join("data.db")))
+    automate(conn, 13, stop=13, jobs=1)
+    before = conn.execute("SELECT n, partition, solution FROM specht ORDER BY partition").fetchall()
+    conn.execute("DELETE FROM specht WHERE partition IN ('7,3,3', '3,3,3,1,1,1,1', '13')")
+    conn.commit()
+    solved = []
+    automate(conn, 13, stop=13, solver=lambda p: solved.append(p) or find_solution_new(p))
+    assert len(solved) == 1 # only the deleted pair; (13) is known from (1^13)
+    assert conn.execute("SELECT n, partition, solution FROM specht ORDER BY partition").fetchall() == before
+
+def test_metrics(tmpdir):
+    conn = make_db(str(tmpdir.join("data.db")))
+    automate(conn, 12, stop=13, jobs=1)
+    rows = conn.execute("SELECT partition, n, dimension, pair_tests, pairs_seconds, wall_seconds FROM specht_metrics").fetchall()
+    # one row per solved pair, for whichever side was solved; the pairs in
+    # known families are not solved at all
+    assert len(rows) == 1
+    p_str, n, f, pair_tests, pairs_seconds, wall_seconds = rows[0]
+    assert p_str in ("7,3,3", "3,3,3,1,1,1,1")
+    assert n == 13
+    assert f == Partition(p_str).dimension()
+    assert 0 < pair_tests <= f * (f - 1) // 2
+    assert 0 <= pairs_seconds <= wall_seconds
+
+def test_resume_from(tmpdir):
+    conn = make_db(str(tmpdir.join("data.db")))
+    assert resume_from(conn.cursor()) == 2
+    automate(conn, 2, stop=9, jobs=1)
+    assert resume_from(conn.cursor()) == 9
+    # as if an interrupted pipeline had stored n = 9 before finishing n = 6
+    conn.execute("DELETE FROM specht WHERE partition = '6'")
+    conn.commit()
+    assert resume_from(conn.cursor()) == 6
+
+def test_memo_per_n(tmpdir):
+    conn = make_db(str(tmpdir.join("data.db")))
+    automate(conn, 7, stop=7, regen=True, jobs=1)
+    shapes = automation._memo["shapes"]
+    assert automation._memo["n"] == 7 and max(sum(shape) for shape in shapes) == 7
+    # the sub-shapes of the partitions of 7 are dropped on moving to 8
+    automate(conn, 8, stop=8, regen=True, jobs=1)
+    assert automation._memo["n"] == 8 and automation._memo["shapes"] is not shapes
+    assert max(sum(shape) for shape in automation._memo["shapes"]) == 8
+
+# Automation on a pool of 2 processes in a fresh interpreter, where the
+# solve of every partition of 7 outside the 1D family hangs.
+INTERRUPTED = """
+import sys, time
+sys.path.insert(0, {root!r})
+from package import automation, db
+solve = automation._solve
+def hanging_solve(job):
+    if job[1] not in [(7,), (1,) * 7]:
+        time.sleep(600)
+    return solve(job)
+automation._solve = hanging_solve
+conn = db.connect({path!r})
+sys.stdout.write("started\\n")
+sys.stdout.flush()
+try:
+    automation.automate(conn, 7, stop=7, regen=True, jobs=2)
+except KeyboardInterrupt:
+    sys.stdout.write("interrupted\\n")
+"""
+
+def test_interrupt(tmpdir):
+    path = str(tmpdir.join("data.db"))
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    # in a session of its own, so that hung workers can be killed with it
+    proc = subprocess.Popen([sys.executable, "-c", INTERRUPTED.format(root=root, path=path)],
+                            stdout=subprocess.PIPE, preexec_fn=os.setsid)
+    try:
+        assert proc.stdout.readline() == "started\n"
+        time.sleep(2)
+        proc.send_signal(signal.SIGINT)
+        deadline = time.time() + 20
+        while proc.poll() is None and time.time() < deadline:
+            time.sleep(0.1)
+        assert proc.poll() == 0
+    finally:
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except OSError:
+            pass
+    assert proc.stdout.read() == "interrupted\n"
+    # the pair solved before the interrupt was flushed
+    rows = make_db(path).execute("SELECT partition FROM specht").fetchall()
+    assert sorted(row[0] for row in rows) == ["1,1,1,1,1,1,1", "7"]
@@ -0,0 +1,88 @@
+from .. import cache, checkpoint, polytabloid
+from ..polytabloid import CandidateIndex, find_solution_new, standard_vals, standards_array, total_order
+from ..pool import find_solution_pool
+import numpy as np
+import os
+import pytest
+import time
+
+def test_standards_cached(tmpdir, monkeypatch):
+    monkeypatch.setenv("POLYTABLOID_CACHE", str(tmpdir))
+    shape = (3,2,1)
+    vals = standard_vals(shape)
+    assert tmpdir.join("standards-v1-3-2-1.npy").check()
+    assert tmpdir.join("standards-v1-3-2-1.npy").stat().mode & 0o777 == 0o644
+    assert isinstance(standard_vals(shape), np.memmap)
+    assert vals.tolist() == [t.vals for t in total_order(shape)]
+    assert standard_vals(shape, reverse=True).tolist() == vals.tolist()[::-1]
+
+def test_format_version(tmpdir, monkeypatch):
+    monkeypatch.setenv("POLYTABLOID_CACHE", str(tmpdir))
+    standard_vals((2,2))
+    monkeypatch.setattr(cache, "FORMAT_VERSION", 2)
+    assert cache.load("standards", (2,2)) is None
+    standard_vals((2,2))
+    assert tmpdir.join("standards-v2-2-2.npy").check()
+
+def test_disabled(monkeypatch):
+    monkeypatch.setenv("POLYTABLOID_CACHE", "")
+    assert not isinstance(standard_vals((2,1)), np.memmap)
+
+class Crash(Exception):
+    pass
+
+def test_checkpoint_resume(tmpdir, monkeypatch):
+    monkeypatch.setenv("POLYTABLOID_CACHE", str(tmpdir))
+    monkeypatch.setattr(checkpoint, "INTERVAL", 0)
+    shape = (4,2,1)
+    candidates = CandidateIndex.candidates
+    calls = []
+    def counted(self, t, *args, **kwargs):
+        calls.append(kwargs["stop"])
+        if interrupt_at is not None:
+            time.sleep(0.02) # slow enough for a checkpoint every tableau
+            if len(calls) == interrupt_at:
+                raise Crash()
+        return candidates(self, t, *args, **kwargs)
+    monkeypatch.setattr(CandidateIndex, "candidates", counted)
+    interrupt_at = None
+    expected = find_solution_new(shape, checkpoint=False)
+    total = len(calls)
+    calls[:] = []
+    interrupt_at = total // 2
+    with pytest.raises(Crash):
+        find_solution_new(shape)
+    path = checkpoint.checkpoint_path("solve", shape)
+    index = checkpoint.Checkpoint("solve", shape).load()["index"]
+    assert index > 0
+    finished = sum(1 for i in calls if i < index)
+    interrupt_at = None
+    calls[:] = []
+    assert find_solution_new(shape) == expected
+    assert len(calls) == total - finished
+    assert not os.path.exists(path)
+
+def test_checkpoint_columns(tmpdir, monkeypatch):
+    monkeypatch.setenv("POLYTABLOID_CACHE", str(tmpdir))
+    shape = (3,3,3)
+    f = len(standards_array(shape))
+    expected = find_solution_pool(shape, processes=2, return_matrix=True, checkpoint=False)
+    cp = checkpoint.Checkpoint("columns", shape)
+    columns = checkpoint.load_columns(cp, f)
+    assert columns == [None] * f
+    # the first half of the columns were done before a crash; an extra
+    # one in them shows that they are not computed again
+    columns[:f // 2] = [expected.column(j) for j in range(f // 2)]
+    columns[0] = np.append(columns[0], f - 1)
+    checkpoint.save_columns(cp, columns)
+    matrix = find_solution_pool(shape, processes=2, chunk_size=f - f // 2, return_matrix=True)
+    assert matrix.nnz == expected.nnz + 1
+    assert matrix[f - 1, 0] and not expected[f - 1, 0]
+    assert not os.path.exists(cp.path)
+
+def test_standards_array_bounded():
+    shapes = [(3,2), (3,1,1), (2,2,1), (4,1), (3,2,1), (4,2)]
+    arrays = [standards_array(shape) for shape in shapes]
+    assert standards_array(shapes[-1]) is arrays[-1]
+    assert len(polytabloid._standards_arrays) == 4
+    assert standards_array(shapes[0]) is not arrays[0] # evicted, so rebuilt
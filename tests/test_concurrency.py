@@ -1,6 +1,9 @@
-from ..tasks import app, find_solution_concurrent
-from ..polytabloid import find_solution, find_solution_new, total_order
-from ..partition import Partition, partition_gen, self_conjugates_gen
+from ..tasks import Pipeline, app, find_solution_concurrent
+from ..automation import automate
+from .. import db
+from ..polytabloid import find_solution, total_order
+from ..solutions import cached_solution
+from ..partition import Partition, partition_gen, self_conjugates_gen, two_special_pairs
 
 def test_celery():
     for n in range(2,12):
@@ -10,14 +13,14 @@ def test_celery():
             if not p.is_2special() or not p.conjugate().is_2special():
                 continue
             print p
-            assert find_solution_new(p) == find_solution_concurrent(p)
+            assert cached_solution(p) == find_solution_concurrent(p)
 
 def test_self_conjugates():
     for i in range(2,20):
         for sc in self_conjugates_gen(i):
             print sc
             assert sc.is_self_conjugate()
-            assert find_solution_concurrent(sc) % 2 == 0
+            assert find_solution_concurrent(sc) % 2 == cached_solution(sc) == 0
 
 def matrix_diff(m1, m2):
     diff = []
@@ -44,3 +47,22 @@ def test_333():
         for n1, n2 in zip(r1, r2):
             assert n1 == n2
     assert find_solution_concurrent(p) == 0
+
+def test_pipeline(tmpdir):
+    pipeline = Pipeline(max_in_flight=3)
+    shapes = [p.vals for n in range(5, 10) for p, p2 in two_special_pairs(n)]
+    for shape in shapes:
+        pipeline.submit(shape, tag=shape)
+    assert len(pipeline) == len(shapes)
+    assert len(pipeline.running) == 3
+    solved = dict((tag, (solution, metrics)) for tag, solution, metrics in pipeline.as_completed())
+    assert len(pipeline) == 0
+    for shape in shapes:
+        solution, metrics = solved[shape]
+        assert solution == cached_solution(shape)
+        assert metrics["dimension"] == Partition(*shape).dimension()
+    conn = db.connect(str(tmpdir.join("data.db")))
+    automate(conn, 2, stop=13, pipeline=Pipeline(max_in_flight=2))
+    for n, p_str, sol in conn.execute("SELECT n, partition, solution FROM specht WHERE n < 12"):
+        assert sol == cached_solution(Partition(p_str))
+    assert conn.execute("SELECT count(*) FROM specht_metrics WHERE n = 13").fetchone()[0] == 1
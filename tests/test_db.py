@@ -0,0 +1,37 @@
+from .. import db
+from ..partition import Partition
+import sqlite3
+
+def test_migrate(tmpdir):
+    """
+    Rows from the original three-column schema get their new columns
+    filled in when the database is opened.
+    """
+    path = str(tmpdir.join("data.db"))
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE specht (n integer, partition text primary key, solution integer)")
+    conn.executemany("INSERT INTO specht VALUES (?,?,?)", [(5, "3,1,1", 1), (5, "5", 1), (4, "2,2", 0)])
+    conn.commit()
+    conn.close()
+    cur = db.connect(path).cursor()
+    assert cur.execute("SELECT num_parts, conjugate, is_hook, is_one_dimensional, is_self_conjugate FROM specht WHERE partition='3,1,1'").fetchone() == (3, "3,1,1", 1, 0, 1)
+    indexes = set(row[1] for row in cur.execute("PRAGMA index_list(specht)"))
+    assert "specht_n" in indexes and "specht_is_hook" in indexes
+
+def test_query(tmpdir):
+    conn = db.connect(str(tmpdir.join("data.db")))
+    db.insert_solutions(conn, [(5, Partition(3,1,1), 1), (5, Partition(5), 1), (5, Partition(1,1,1,1,1), 1), (4, Partition(2,2), 0), (9, Partition(5,3,1), 0)])
+    partitions = lambda **filters: sorted(row[1] for row in db.query(conn.cursor(), **filters))
+    assert partitions(family="hook") == ["1,1,1,1,1", "3,1,1"]
+    assert partitions(family="1d") == ["1,1,1,1,1", "5"]
+    assert partitions(family="self-conjugate") == ["2,2", "3,1,1"]
+    assert partitions(family="none") == ["5,3,1"]
+    assert partitions(family="hook", n=5, solution=1) == ["1,1,1,1,1", "3,1,1"]
+    assert partitions(solution=0) == ["2,2", "5,3,1"]
+    assert db.query_width(conn.cursor(), n=5) == len("1,1,1,1,1")
+    try:
+        db.family_clause("tall")
+    except ValueError:
+        pass
+    else:
+        assert False
@@ -0,0 +1,62 @@
+from ..gf2 import GF2Matrix, SparseGF2Matrix, pack_rows, unpack_rows
+from numpy.linalg import LinAlgError
+import numpy as np
+
+def random_invertible(n, rng):
+    """
+    Unitriangular matrices are always invertible; shuffle rows and columns
+    so that elimination actually has to pivot.
+    """
+    m = np.tril(rng.randint(0, 2, (n, n)), -1) + np.eye(n, dtype=int)
+    return m[rng.permutation(n)][:, rng.permutation(n)]
+
+def test_pack_roundtrip():
+    rng = np.random.RandomState(0)
+    for n in (1, 63, 64, 65, 200):
+        bits = rng.randint(0, 2, (5, n)).astype(bool)
+        assert pack_rows(bits).shape == (5, (n + 63) // 64)
+        assert (unpack_rows(pack_rows(bits), n) == bits).all()
+
+def test_from_columns():
+    columns = [[1, 0, 0], [1, 1, 0], [0, 1, 1]]
+    m = GF2Matrix.from_columns(columns)
+    assert (m.to_dense() == np.column_stack(columns)).all()
+    assert [row for row in m] == np.column_stack(columns).tolist()
+
+def test_solve():
+    rng = np.random.RandomState(1)
+    for n in (1, 2, 10, 64, 65, 150):
+        a = random_invertible(n, rng)
+        b = rng.randint(0, 2, n)
+        x = GF2Matrix.from_dense(a).solve(b)
+        assert ((a.dot(x) - b) % 2 == 0).all()
+        assert GF2Matrix.from_dense(a).rank() == n
+
+def test_singular():
+    m = GF2Matrix.from_dense([[1, 1], [1, 1]])
+    assert m.rank() == 1
+    try:
+        m.solve([1, 1])
+    except LinAlgError:
+        pass
+    else:
+        assert False
+
+def test_sparse_solve(tmpdir):
+    rng = np.random.RandomState(2)
+    for n in (1, 2, 10, 65, 150):
+        lower = np.tril(rng.randint(0, 2, (n, n)), -1) + np.eye(n, dtype=int)
+        b = rng.randint(0, 2, n)
+        for a, kind in ((lower, "lower"), (lower.T, "upper"), (random_invertible(n, rng), None)):
+            m = SparseGF2Matrix.from_dense(a)
+            assert m.nnz == a.sum()
+            assert (m.to_dense() == a).all()
+            if n >= 10: # small shuffled matrices can be triangular by chance
+                assert m.triangular() == kind
+            x = m.solve(b)
+            assert ((a.dot(x) - b) % 2 == 0).all()
+            assert (x == GF2Matrix.from_dense(a).solve(b)).all()
+    path = str(tmpdir.join("m.npz"))
+    m.save(path)
+    assert SparseGF2Matrix.load(path) == m
+    assert SparseGF2Matrix.load(path) == GF2Matrix.from_dense(a)
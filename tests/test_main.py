@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+
+PACKAGE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imports main.py and then runs a query through it, in a fresh interpreter,
+# and reports which of the heavy modules each step loaded.
+HEAVY = ("numpy", "polytabloid", "celery")
+QUERY = """
+import runpy, sys
+sys.path.insert(0, {package!r})
+heavy = {heavy!r}
+import main
+sys.stderr.write(" ".join(str(name in sys.modules) for name in heavy) + "\\n")
+sys.argv = ["main.py", "-n", "3"]
+try:
+    runpy.run_path({main!r}, run_name="__main__")
+except SystemExit:
+    pass
+sys.stderr.write(" ".join(str(name in sys.modules) for name in heavy) + "\\n")
+"""
+
+def test_query_imports(tmpdir):
+    code = QUERY.format(package=PACKAGE, main=os.path.join(PACKAGE, "main.py"), heavy=HEAVY)
+    proc = subprocess.Popen([sys.executable, "-c", code], cwd=str(tmpdir), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    out, err = proc.communicate()
+    assert proc.returncode == 0, err
+    imported, queried = err.splitlines()[-2:]
+    assert imported.split() == ["False"] * len(HEAVY)
+    assert queried.split() == ["False"] * len(HEAVY)
+
+# The solvers, as loaded by the pool and celery workers, leave the
+# database layer alone.
+SOLVER = """
+import sys
+sys.path.insert(0, {package!r})
+import polytabloid, pool
+sys.stderr.write(" ".join(str(name in sys.modules) for name in ("db", "sqlite3")) + "\\n")
+"""
+
+def test_solver_imports(tmpdir):
+    proc = subprocess.Popen([sys.executable, "-c", SOLVER.format(package=PACKAGE)], cwd=str(tmpdir), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    out, err = proc.communicate()
+    assert proc.returncode == 0, err
+    assert err.splitlines()[-1].split() == ["False", "False"]
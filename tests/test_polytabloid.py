@@ -1,6 +1,14 @@
-from ..polytabloid import find_solution, find_solution_new
-from ..partition import Partition, partition_gen, hooks_gen, self_conjugates_gen, one_dimensional_gen
+from ..polytabloid import find_solution, find_solution_new, find_solution_stream, find_solutions, find_solution_tiled, corner_vals, shape_table, standard_vals, TiledStandards, total_order, StandardTableaux, Tableaux, TableauxArray, permutation_sign
+from ..partition import Partition, dimension, partition_gen, two_special_pairs, hooks_gen, self_conjugates_gen, one_dimensional_gen
 from math import factorial
+from itertools import permutations, product
+import gc
+import random
+import numpy as np
+import os
+from ..cache import cache_path
+from ..instrument import profile
+from ..solutions import cached_solution
 
 def test_detect_one_dimensional():
     """
@@ -65,4 +73,199 @@ def test_new_algorithm():
             p = Partition(*partition)
             if not p.is_2special() or not p.conjugate().is_2special():
                 continue
-            assert find_solution_new(partition) == find_solution(partition)
+            # find_solution_new, through the cache that test_celery shares
+            assert cached_solution(partition) == find_solution(partition)
+
+def test_total_order():
+    """
+    The enumeration should produce every standard tableau exactly once,
+    as many as the hook length formula predicts, in either direction.
+    """
+    assert dimension((3,2)) == 5
+    assert dimension((3,3,3)) == 42
+    for n in range(1,8):
+        for partition in partition_gen(n):
+            shape = tuple(sorted(partition)[::-1])
+            forward = [t.vals for t in total_order(shape)]
+            backward = [t.vals for t in total_order(shape, reverse=True)]
+            assert len(forward) == dimension(shape)
+            assert len(set(map(tuple, forward))) == len(forward)
+            assert backward == forward[::-1]
+            assert all(t.is_standard() for t in total_order(shape))
+
+def test_batch_generates():
+    """
+    TableauxArray.generates should agree with Tableaux.generates pair by pair.
+    """
+    for shape in [(3,2), (3,3,3), (4,2,1), (3,2,1,1), (2,2,2,1)]:
+        standards = TableauxArray.from_shape(shape)
+        tableaux = list(total_order(shape))
+        for t in tableaux:
+            expected = [t.generates(s) for s in tableaux]
+            assert standards.generates(t).tolist() == expected
+            assert standards.generates(t, start=2, stop=5).tolist() == expected[2:5]
+
+def tabloid_expansion(t):
+    """
+    Brute force e_t as a dict of tabloids (tuples of row sets) to coefficients.
+    """
+    columns = list(t.columns())
+    expansion = {}
+    for perms in product(*[list(permutations(col)) for col in columns]):
+        sign = 1
+        for col, perm in zip(columns, perms):
+            sign *= permutation_sign([col.index(k) for k in perm])
+        s = Tableaux(t.shape, t.vals)
+        for i, col in enumerate(perms):
+            s.set_column(i, col)
+        tabloid = tuple(frozenset(row) for row in s.rows())
+        expansion[tabloid] = expansion.get(tabloid, 0) + sign
+    return dict((k, v) for k, v in expansion.items() if v)
+
+def test_straighten():
+    """
+    Straightening should give coefficients that reproduce the polytabloid
+    as a combination of standard polytabloids.
+    """
+    rng = random.Random(0)
+    for shape in [(2,2), (3,2), (2,2,1), (3,2,1), (2,2,2), (3,3,1)]:
+        t = Tableaux(shape)
+        assert t.straighten() == {t: 1}
+        for _ in range(5):
+            vals = list(range(1, sum(shape) + 1))
+            rng.shuffle(vals)
+            t = Tableaux(shape, vals)
+            expansion = t.straighten()
+            assert all(s.is_standard() for s in expansion)
+            combined = {}
+            for s, coeff in expansion.items():
+                for tabloid, c in tabloid_expansion(s).items():
+                    combined[tabloid] = combined.get(tabloid, 0) + coeff * c
+            assert dict((k, v) for k, v in combined.items() if v) == tabloid_expansion(t)
+            mod2 = t.straighten(modulus=2)
+            assert mod2 == dict((s, c % 2) for s, c in expansion.items() if c % 2)
+
+def test_straighten_large():
+    # a column group of 4! * 4! * 3! * 3! = 20736 permutations, whose
+    # polytabloid has 2147 standard terms mod 2
+    shape = (4,4,4,2)
+    t = Tableaux(shape, [5, 1, 2, 9, 13, 8, 11, 7, 4, 14, 3, 6, 10, 12])
+    table = shape_table(shape)
+    table.straightened.clear()
+    expansion = t.straighten(modulus=2)
+    assert len(expansion) == 2147
+    assert all(s.is_standard() and c == 1 for s, c in expansion.items())
+    # only the expansion asked for is kept, and reused
+    memo = table.straightened[2]
+    assert [len(terms) for terms in memo.values()] == [2147]
+    assert t.straighten(modulus=2) == expansion
+    assert len(memo) == 1
+
+def test_rank_unrank():
+    for shape in [(1,), (3,2), (3,3,3), (4,2,1), (2,2,1,1)]:
+        for reverse in (False, True):
+            order = StandardTableaux(shape, reverse=reverse)
+            for i, t in enumerate(order):
+                assert order.rank(t) == i
+                assert order.rank(t.vals) == i
+                assert order.unrank(i) == t
+
+def test_stream_algorithm():
+    for n in range(2,10):
+        for partition in partition_gen(n):
+            p = Partition(*partition)
+            if not p.is_2special() or not p.conjugate().is_2special():
+                continue
+            assert find_solution_stream(p, block_size=8) == find_solution_new(p)
+    assert find_solution_stream((4,3,2,1), block_size=100) == find_solution_new((4,3,2,1))
+
+def test_two_special_pairs():
+    """
+    The pruned generator should find exactly the 2-special partitions with
+    2-special conjugates, once per conjugate pair.
+    """
+    for n in range(1,20):
+        expected = set()
+        for partition in partition_gen(n):
+            p = Partition(*partition)
+            if p.is_2special() and p.conjugate().is_2special():
+                expected.add(frozenset([p.vals, p.conjugate().vals]))
+        pairs = [frozenset([p.vals, p2.vals]) for p, p2 in two_special_pairs(n)]
+        assert len(pairs) == len(set(pairs))
+        assert set(pairs) == expected
+        for p, p2 in two_special_pairs(n):
+            assert p2 == p.conjugate()
+            assert p.num_row_perms() >= p2.num_row_perms()
+
+def test_partition_interning():
+    p = Partition(3,1,1)
+    assert Partition(1,3,1) is p
+    assert Partition("3,1,1") is p
+    assert p.conjugate() is p
+    assert p.is_self_conjugate() and p.is_hook() and not p.is_one_dimensional()
+    q = Partition(4,2)
+    assert q.conjugate() == Partition(2,2,1,1)
+    assert q.conjugate().conjugate() is q
+    assert len(set([q, Partition(2,4), q.conjugate()])) == 2
+    assert q.dimension() == dimension((4,2)) == 9
+    assert q.num_row_perms() == 48
+    # interning holds no reference of its own
+    r = Partition(9,9,8)
+    key = r.vals
+    assert Partition._interned[key] is r
+    del r
+    gc.collect()
+    assert key not in Partition._interned
+
+def test_candidate_index():
+    for shape in [(3,2,1), (4,2,1,1), (3,3,2), (5,1,1), (4,4)]:
+        standards = TableauxArray.from_shape(shape, reverse=True)
+        index = standards.candidate_index()
+        for i in range(len(standards)):
+            t = standards[i]
+            expected = np.flatnonzero(standards.generates(t))
+            candidates = index.candidates(t)
+            assert set(expected) <= set(candidates)
+            assert (candidates == np.sort(candidates)).all()
+            assert (candidates[standards.generates_at(t, candidates)] == expected).all()
+            below = index.candidates(t, start=i // 2, stop=i)
+            assert set(below) == set(c for c in candidates if i // 2 <= c < i)
+
+def test_find_solutions():
+    memo = {}
+    for n in range(2, 11):
+        shapes = [p for p, p2 in two_special_pairs(n)] + [Partition(*p) for p in list(partition_gen(n))[:5]]
+        assert find_solutions(shapes, checkpoint=False, memo=memo) == [find_solution_new(p, checkpoint=False) for p in shapes]
+    for shape in [(3,2,1), (4,4,1), (5,1,1,1)]:
+        assert corner_vals(shape, memo).tolist() == [t.vals for t in total_order(shape)]
+    assert (2,1) in memo and (3,3,2) in memo
+
+def test_tiled_algorithm(tmpdir, monkeypatch):
+    monkeypatch.setenv("POLYTABLOID_CACHE", "")
+    for n in range(2,10):
+        for p, p2 in two_special_pairs(n):
+            for shape in (p, p2):
+                assert find_solution_tiled(shape, block_size=8, checkpoint=False) == find_solution_new(shape, checkpoint=False)
+    shape = (4,3,2,1)
+    tiles = TiledStandards(shape, block_size=96)
+    assert os.path.isdir(tiles.directory)
+    tiles.close()
+    assert not os.path.exists(tiles.directory) # temporary without a cache
+    monkeypatch.setenv("POLYTABLOID_CACHE", str(tmpdir))
+    solution = find_solution_tiled(shape, block_size=96)
+    # the blocks are read from the standards array cached for every solver,
+    # and nothing else is left on disk
+    assert [path.basename for path in tmpdir.listdir() if path.isfile()] == [os.path.basename(cache_path("standards", shape))]
+    assert solution == find_solution_new(shape, checkpoint=False)
+    tiles = TiledStandards(shape, block_size=96)
+    assert tiles.num_blocks == 8 # 768 tableaux
+    vals = np.concatenate([block.vals for start, block in tiles.blocks()])
+    assert vals.tolist() == [t.vals for t in total_order(shape, reverse=True)]
+    assert (standard_vals(shape, reverse=True) == vals).all()
+
+def test_find_solution_pair_tests():
+    profile.reset()
+    find_solution((3,2,1), skip_known_families=False)
+    # 16 tableaux, each against the 2! * 2! * 1! - 1 other images under the
+    # column permutations fixing 1
+    assert profile.counts["pair_tests"] == 16 * 3
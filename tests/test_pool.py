@@ -0,0 +1,31 @@
+from ..pool import find_solution_pool
+from ..polytabloid import find_solution, find_solution_new
+from ..partition import Partition, partition_gen
+from ..instrument import profile
+
+def test_pool():
+    for n in range(2,10):
+        for partition in partition_gen(n):
+            p = Partition(*partition)
+            if not p.is_2special() or not p.conjugate().is_2special():
+                continue
+            assert find_solution_new(p) == find_solution_pool(p, processes=2)
+
+def test_pool_333():
+    p = Partition(3,3,3)
+    m1 = find_solution_pool(p, processes=2, chunk_size=5, return_matrix=True)
+    m2 = find_solution(p, skip_known_families=False, return_matrix=True)
+    assert m1 == m2
+    assert find_solution_pool(p) == 0
+
+def test_pool_pair_tests():
+    p = Partition(4,3,2)
+    f = p.dimension()
+    counts = []
+    for chunk_size in (7, 50):
+        profile.reset()
+        find_solution_pool(p, processes=2, chunk_size=chunk_size, checkpoint=False)
+        counts.append(profile.counts["pair_tests"])
+    # the candidates actually tested, however the rows are chunked
+    assert counts[0] == counts[1]
+    assert 0 < counts[0] < f * (f - 1) // 2
@@ -0,0 +1,25 @@
+from ..schedule import CostModel, MIN_SAMPLES, features, schedule
+from ..partition import Partition, partition_gen, two_special_pairs
+import numpy as np
+
+def test_choose_and_order():
+    model = CostModel()
+    pairs = [(p, p2) for n in range(2, 14) for p, p2 in two_special_pairs(n)]
+    jobs = schedule(pairs, model)
+    assert len(jobs) == len(pairs)
+    costs = [cost for p, p2, cost in jobs]
+    assert costs == sorted(costs, reverse=True)
+    for p, p2, cost in jobs:
+        assert p2 == p.conjugate()
+        assert cost == model.predict(p) <= model.predict(p2)
+
+def test_fit():
+    coefficients = (1e-3, 2e-6, 1e-9, 5e-11)
+    samples = [(Partition(*p), float(np.dot(coefficients, features(Partition(*p)))))
+               for n in range(8, 14) for p in partition_gen(n)]
+    model = CostModel.fit(samples)
+    for p, seconds in samples:
+        if seconds >= 0.01:
+            assert abs(model.predict(p) - seconds) < 1e-3 * seconds
+    # too little data to refit
+    assert (CostModel.fit(samples[-MIN_SAMPLES + 1:]).coefficients == CostModel().coefficients).all()
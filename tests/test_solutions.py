@@ -0,0 +1,49 @@
+from ..lru import LRUCache
+from ..solutions import SolutionCache, cached_solution, solution_cache
+from ..polytabloid import find_solution_new
+from ..partition import Partition, two_special_pairs
+from .. import db
+
+def test_lru():
+    lru = LRUCache(maxsize=2)
+    lru.put("a", 1)
+    lru.put("b", 2)
+    assert lru.get("a") == 1
+    lru.put("c", 3) # evicts b, the least recently used
+    assert lru.get("b") is None
+    assert (lru.get("a"), lru.get("c"), len(lru)) == (1, 3, 2)
+
+def test_solution_cache(tmpdir):
+    conn = db.connect(str(tmpdir.join("data.db")))
+    solved = []
+    cache = SolutionCache(conn, solver=lambda shape: solved.append(shape) or find_solution_new(shape))
+    p = Partition(7,3,3)
+    expected = find_solution_new(p)
+    assert cache.get(p) == expected
+    assert cache.get(p.conjugate()) == expected
+    assert solved == [p.vals]
+    assert cache.stats["lru"] == 1
+    # both sides were stored, so a fresh cache finds them in the table
+    assert db.lookup_solution(conn.cursor(), p.conjugate()) == expected
+    fresh = SolutionCache(conn, solver=lambda shape: 1/0)
+    assert fresh.get(p.conjugate()) == expected and fresh.stats["db"] == 1
+    # known families never reach the table or the solver
+    for n in range(2, 13):
+        for q, q2 in two_special_pairs(n):
+            assert fresh.get(q2) == find_solution_new(q) % 2
+    assert fresh.stats["solver"] == 0
+    assert conn.execute("SELECT count(*) FROM specht").fetchone()[0] == 2
+
+def test_cached_solution(tmpdir):
+    path = str(tmpdir.join("data.db"))
+    conn = db.connect(path)
+    solved = []
+    solver = lambda shape: solved.append(shape) or find_solution_new(shape)
+    assert cached_solution((7,3,3), conn, solver) == find_solution_new((7,3,3)) % 2
+    assert cached_solution((3,3,3,1,1,1,1), conn, solver) == cached_solution((7,3,3))
+    assert solved == [(7,3,3)]
+    # one cache per database file, holding a connection of its own
+    cache = solution_cache(conn)
+    assert solution_cache(db.connect(path)) is cache and cache.conn is not conn
+    assert db.lookup_solution(conn.cursor(), Partition(7,3,3)) is not None
+    assert solution_cache(db.connect(str(tmpdir.join("other.db")))) is not cache